@@ -98,6 +98,11 @@ def _extract_sources_from_knowledge(knowledge_result: str) -> List[str]:
     return sources
 
 
+# Section headers emitted by the knowledge tool, e.g.
+# "=== TEXT WISSEN (Relevante Dokument-Abschnitte) ===" or "=== GRAPH WISSEN ==="
+_SECTION_HEADER_RE = re.compile(r"^=== (TEXT|GRAPH) WISSEN[^\n]*===$", re.MULTILINE)
+
+
 def _extract_contexts(tool_outputs: dict) -> tuple[str, str]:
     """
     Extracts vector and graph contexts from tool outputs.
@@ -110,31 +115,17 @@ def _extract_contexts(tool_outputs: dict) -> tuple[str, str]:
     """
     knowledge_result = tool_outputs.get("knowledge_result", "")
     
-    # Extract vector context (TEXT WISSEN section)
+    # Single split on the real section headers only, so "===" inside chunk
+    # content (e.g. Markdown underlines) cannot shift the sections.
+    # The section kind ("TEXT"/"GRAPH") is at odd indices, followed by its content.
     vector_context = ""
-    if "TEXT WISSEN" in knowledge_result:
-        parts = knowledge_result.split("=== TEXT WISSEN")
-        if len(parts) > 1:
-            text_section = parts[1].split("===")[0]
-            vector_context = text_section.strip()[:1000]  # Truncate
-    
-    # Extract graph context (GRAPH WISSEN section)
     graph_context = ""
-    if "GRAPH WISSEN" in knowledge_result:
-        parts = knowledge_result.split("=== GRAPH WISSEN")
-        if len(parts) > 1:
-            graph_section = parts[1]
-            # The format is: " (Entitäten und Beziehungen) ===\nActual content\n=== NEXT SECTION"
-            # Find the closing === of the header and take content after it
-            header_end = graph_section.find("===")
-            if header_end != -1:
-                # Skip past the "===" and get the actual content
-                graph_section = graph_section[header_end + 3:]
-                # Now find the next section marker if any
-                next_section = graph_section.find("===")
-                if next_section != -1:
-                    graph_section = graph_section[:next_section]
-            graph_context = graph_section.strip()[:1000]  # Truncate
+    parts = _SECTION_HEADER_RE.split(knowledge_result)
+    for kind, content in zip(parts[1::2], parts[2::2]):
+        if not vector_context and kind == "TEXT":
+            vector_context = content.strip()[:1000]  # Truncate
+        elif not graph_context and kind == "GRAPH":
+            graph_context = content.strip()[:1000]  # Truncate
     
     # Fallback to SQL results if no knowledge
     if not vector_context and not graph_context:
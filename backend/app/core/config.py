@@ -86,6 +86,11 @@ class Settings(BaseSettings):
     minio_secret_key: str = Field(default="minioadmin", alias="MINIO_SECRET_KEY")
     minio_bucket_name: str = Field(default="knowledge-documents", alias="MINIO_BUCKET_NAME")
     minio_secure: bool = Field(default=False, alias="MINIO_SECURE")
+    minio_max_concurrency: int | None = Field(
+        default=None,
+        alias="MINIO_MAX_CONCURRENCY",
+        description="Max concurrent storage operations (default: min(32, 4 x CPU count))",
+    )
 
     # -------------------------------------------------------------------------
     # Worker Connection Settings (Public URLs for external Worker access)
@@ -157,6 +162,74 @@ class Settings(BaseSettings):
         default="jina/jina-embeddings-v2-base-de",
         alias="EMBEDDING_MODEL",
     )
+    embedding_batch_size: int = Field(
+        default=1000,
+        alias="EMBEDDING_BATCH_SIZE",
+        description="Texts per embedding request (match the server's max batch, e.g., 32 for TEI)",
+    )
+    embedding_dimensions: int | None = Field(
+        default=None,
+        alias="EMBEDDING_DIMENSIONS",
+        description="Embedding vector size (e.g., 768 for jina-embeddings-v2). Required for the HNSW index.",
+    )
+
+    # -------------------------------------------------------------------------
+    # Vector Index (pgvector HNSW)
+    # Unset values are chosen automatically from the collection size.
+    # -------------------------------------------------------------------------
+    hnsw_m: int | None = Field(default=None, alias="HNSW_M")
+    hnsw_ef_construction: int | None = Field(default=None, alias="HNSW_EF_CONSTRUCTION")
+    hnsw_ef_search: int | None = Field(default=None, alias="HNSW_EF_SEARCH")
+    vector_index_build_workers: int = Field(
+        default=7,
+        alias="VECTOR_INDEX_BUILD_WORKERS",
+        description="max_parallel_maintenance_workers for (re)building the vector index",
+    )
+    vector_index_build_memory: str | None = Field(
+        default=None,
+        alias="VECTOR_INDEX_BUILD_MEMORY",
+        description="maintenance_work_mem for (re)building the vector index (e.g., '2GB')",
+    )
+    vector_iterative_scan: str | None = Field(
+        default=None,
+        alias="VECTOR_ITERATIVE_SCAN",
+        description="pgvector >= 0.8 iterative index scan for filtered search: 'relaxed_order' or 'strict_order' (HNSW only)",
+    )
+    embedding_halfvec: bool = Field(
+        default=False,
+        alias="EMBEDDING_HALFVEC",
+        description="Store embeddings as halfvec (FP16, pgvector >= 0.7) to halve index memory",
+    )
+    vector_filter_columns: bool = Field(
+        default=False,
+        alias="VECTOR_FILTER_COLUMNS",
+        description="Promote document_id/filename to indexed generated columns (rewrites the embedding table once)",
+    )
+    vector_binary_candidates: int | None = Field(
+        default=None,
+        alias="VECTOR_BINARY_CANDIDATES",
+        description="Enable binary-quantized first-pass search (pgvector >= 0.7): candidates re-ranked by exact cosine",
+    )
+
+    # -------------------------------------------------------------------------
+    # Vector Store Connection Pool (SQLAlchemy async engine)
+    # -------------------------------------------------------------------------
+    vector_pool_size: int = Field(default=10, alias="VECTOR_POOL_SIZE")
+    vector_pool_max_overflow: int = Field(default=20, alias="VECTOR_POOL_MAX_OVERFLOW")
+    vector_pool_recycle: int = Field(
+        default=300,
+        alias="VECTOR_POOL_RECYCLE",
+        description="Seconds after which pooled connections are replaced (-1 disables recycling)",
+    )
+
+    # -------------------------------------------------------------------------
+    # SQL Tool (external SQL sources)
+    # -------------------------------------------------------------------------
+    sql_max_query_length: int = Field(
+        default=10_000,
+        alias="SQL_MAX_QUERY_LENGTH",
+        description="Longest SQL query (characters) the SQL tool validates; 0 disables the limit",
+    )
 
     # -------------------------------------------------------------------------
     # LLM Model (for graph extraction and other LLM tasks)
@@ -17,6 +17,7 @@ from app.core.config import get_settings
 from app.db.base import Base
 from app.db.session import async_engine
 from app.services.storage import get_minio_service
+from app.services.vector_store import get_vector_store_service
 
 settings = get_settings()
 
@@ -141,6 +142,13 @@ async def lifespan(app: FastAPI):
     minio = get_minio_service()
     await minio.ensure_bucket_exists()
     logger.info("✅ MinIO bucket ready")
+
+    # Ensure vector index exists (non-fatal: search still works without it)
+    try:
+        await get_vector_store_service().ensure_index()
+        logger.info("✅ Vector index ready")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not ensure vector index: {e}")
     
     print("✅ Startup complete!")
     logger.info("✅ Startup complete! Ready to accept requests.")
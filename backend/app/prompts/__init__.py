@@ -6,8 +6,9 @@ um sicheres und einfaches Prompt-Engineering zu ermöglichen.
 """
 
 import logging
+import os
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,7 @@ class PromptLoader:
     """Lädt und cached Prompts aus Text-Dateien."""
     
     _cache: Dict[str, str] = {}
+    _available: Optional[list[str]] = None  # Verzeichnis-Scan, gecached bis reload()
     
     @classmethod
     def load(cls, prompt_name: str) -> str:
@@ -67,11 +69,29 @@ class PromptLoader:
         """
         Listet alle verfügbaren Prompts auf.
         
+        Das Verzeichnis wird nur einmal gescannt; reload() erzwingt einen neuen Scan.
+        
         Returns:
             Liste von Prompt-Namen (ohne .txt Extension)
         """
-        prompt_files = PROMPTS_DIR.glob("*.txt")
-        return sorted([p.stem for p in prompt_files])
+        if cls._available is None:
+            cls._available = sorted(p.stem for p in PROMPTS_DIR.glob("*.txt"))
+        return list(cls._available)
+    
+    @classmethod
+    def preload_all(cls) -> None:
+        """
+        Lädt alle Prompts mit einem einzigen Verzeichnis-Scan in den Cache.
+        
+        Ein os.scandir statt exists() + open() pro Prompt; füllt auch
+        den Cache von list_available().
+        """
+        with os.scandir(PROMPTS_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".txt"):
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        cls._cache[entry.name[:-4]] = f.read()
+        cls._available = sorted(cls._cache)
     
     @classmethod
     def reload(cls, prompt_name: str = None) -> None:
@@ -81,6 +101,7 @@ class PromptLoader:
         Args:
             prompt_name: Spezifischer Prompt oder None für alle
         """
+        cls._available = None
         if prompt_name:
             cls._cache.pop(prompt_name, None)
             logger.info(f"Reloaded prompt: {prompt_name}")
@@ -102,21 +123,9 @@ def get_prompt(name: str) -> str:
     return PromptLoader.load(name)
 
 
-# Pre-load commonly used prompts at module import
+# Pre-load all prompts at module import
 try:
-    # Core prompts
-    PromptLoader.load("intent_classification")
-    PromptLoader.load("sql_generation")
-    PromptLoader.load("answer_generation")
-    
-    # Tool description prompts
-    PromptLoader.load("tool_search_knowledge_base")
-    PromptLoader.load("tool_get_crm_facts")
-    PromptLoader.load("tool_check_crm_status")
-    PromptLoader.load("tool_execute_sql_query")
-    PromptLoader.load("tool_get_sql_schema")
-    
+    PromptLoader.preload_all()
     logger.info(f"✅ Prompts loaded: {PromptLoader.list_available()}")
 except Exception as e:
     logger.warning(f"⚠️ Failed to pre-load prompts: {e}")
-
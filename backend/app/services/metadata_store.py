@@ -46,6 +46,7 @@ class SourceDefinition:
         self.modules = config.get("modules", [])
         self.tables = config.get("tables", [])
         self.connection_env = config.get("connection_env")
+        self.pool = config.get("pool", {})  # SQL Connection-Pool Settings (optional)
         self.note = config.get("note", "")
     
     def matches_query(self, query: str) -> float:
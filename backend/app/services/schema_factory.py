@@ -14,6 +14,32 @@ import yaml
 from pydantic import BaseModel, Field, create_model
 
 
+# Static sections of the system instruction (see SchemaFactory.get_system_instruction)
+_NODE_TYPES_HEADER = (
+    "",
+    "## Available Node Types",
+    "Extract entities using ONLY these node types:",
+    "",
+)
+
+_RELATIONSHIP_TYPES_HEADER = (
+    "",
+    "## Available Relationship Types",
+    "Connect nodes using ONLY these relationship types:",
+    "",
+)
+
+_EXTRACTION_RULES_FOOTER = (
+    "",
+    "## Extraction Rules",
+    "1. Only use the node types and relationship types defined above.",
+    "2. Each node must have a unique, descriptive name.",
+    "3. Relationships must connect nodes of appropriate types.",
+    "4. Include relevant properties when available in the source text.",
+    "5. Do not invent information not present in the source.",
+)
+
+
 class OntologyConfig(BaseModel):
     """Parsed ontology configuration from YAML."""
 
@@ -23,6 +49,27 @@ class OntologyConfig(BaseModel):
     relationship_types: list[dict[str, str]]
 
 
+@lru_cache(maxsize=8)
+def _parse_ontology(path_str: str, mtime_ns: int) -> OntologyConfig:
+    """
+    Parse an ontology YAML file into an OntologyConfig.
+
+    Cached by (path, mtime) so repeated SchemaFactory construction reuses the
+    parsed config until the file changes on disk.
+
+    Args:
+        path_str: Resolved path to the YAML ontology configuration file.
+        mtime_ns: Modification time of the file, used as cache key only.
+
+    Returns:
+        OntologyConfig: Parsed ontology configuration.
+    """
+    with open(path_str, "r", encoding="utf-8") as f:
+        raw_config = yaml.safe_load(f)
+
+    return OntologyConfig(**raw_config)
+
+
 class SchemaFactory:
     """
     Factory for creating dynamic Pydantic models based on YAML ontology configuration.
@@ -43,6 +90,10 @@ class SchemaFactory:
         self._models: dict[str, type[BaseModel]] | None = None
         self._node_type_literal: type | None = None
         self._relationship_type_literal: type | None = None
+        self._system_instruction: str | None = None
+        self._json_schema: dict[str, Any] | None = None
+        self._node_type_names: tuple[str, ...] = ()
+        self._rel_type_names: tuple[str, ...] = ()
 
     def load_config(self) -> OntologyConfig:
         """
@@ -61,33 +112,29 @@ class SchemaFactory:
         if not self.config_path.exists():
             raise FileNotFoundError(f"Ontology config not found: {self.config_path}")
 
-        with open(self.config_path, "r", encoding="utf-8") as f:
-            raw_config = yaml.safe_load(f)
-
-        self._config = OntologyConfig(**raw_config)
+        resolved_path = self.config_path.resolve()
+        st = resolved_path.stat()
+        self._config = _parse_ontology(str(resolved_path), st.st_mtime_ns)
+        self._node_type_names = tuple(nt["name"] for nt in self._config.node_types)
+        self._rel_type_names = tuple(rt["name"] for rt in self._config.relationship_types)
         return self._config
 
     def _build_type_literals(self) -> None:
         """Build Literal types for node and relationship types."""
-        config = self.load_config()
-
-        # Extract node type names
-        node_type_names = tuple(nt["name"] for nt in config.node_types)
-        self._node_type_literal = Literal[node_type_names]  # type: ignore
+        self.load_config()
 
-        # Extract relationship type names
-        rel_type_names = tuple(rt["name"] for rt in config.relationship_types)
-        self._relationship_type_literal = Literal[rel_type_names]  # type: ignore
+        self._node_type_literal = Literal[self._node_type_names]  # type: ignore
+        self._relationship_type_literal = Literal[self._rel_type_names]  # type: ignore
 
     def get_node_types(self) -> list[str]:
         """Get list of allowed node type names."""
-        config = self.load_config()
-        return [nt["name"] for nt in config.node_types]
+        self.load_config()
+        return list(self._node_type_names)
 
     def get_relationship_types(self) -> list[str]:
         """Get list of allowed relationship type names."""
-        config = self.load_config()
-        return [rt["name"] for rt in config.relationship_types]
+        self.load_config()
+        return list(self._rel_type_names)
 
     def get_dynamic_models(self) -> dict[str, type[BaseModel]]:
         """
@@ -170,41 +217,23 @@ class SchemaFactory:
         Returns:
             A formatted string describing all node and relationship types.
         """
+        if self._system_instruction is not None:
+            return self._system_instruction
+
         config = self.load_config()
 
-        lines = [
+        header = [
             f"# Domain: {config.domain_name}",
             f"{config.description}",
-            "",
-            "## Available Node Types",
-            "Extract entities using ONLY these node types:",
-            "",
+            *_NODE_TYPES_HEADER,
         ]
+        node_lines = [f"- **{nt['name']}**: {nt['description']}" for nt in config.node_types]
+        rel_lines = [f"- **{rt['name']}**: {rt['description']}" for rt in config.relationship_types]
 
-        for nt in config.node_types:
-            lines.append(f"- **{nt['name']}**: {nt['description']}")
-
-        lines.extend([
-            "",
-            "## Available Relationship Types",
-            "Connect nodes using ONLY these relationship types:",
-            "",
-        ])
-
-        for rt in config.relationship_types:
-            lines.append(f"- **{rt['name']}**: {rt['description']}")
-
-        lines.extend([
-            "",
-            "## Extraction Rules",
-            "1. Only use the node types and relationship types defined above.",
-            "2. Each node must have a unique, descriptive name.",
-            "3. Relationships must connect nodes of appropriate types.",
-            "4. Include relevant properties when available in the source text.",
-            "5. Do not invent information not present in the source.",
-        ])
-
-        return "\n".join(lines)
+        self._system_instruction = "\n".join(
+            header + node_lines + [*_RELATIONSHIP_TYPES_HEADER] + rel_lines + [*_EXTRACTION_RULES_FOOTER]
+        )
+        return self._system_instruction
 
     def get_json_schema(self) -> dict[str, Any]:
         """
@@ -215,8 +244,12 @@ class SchemaFactory:
         Returns:
             JSON schema dict for the ExtractionResult model.
         """
+        if self._json_schema is not None:
+            return self._json_schema
+
         models = self.get_dynamic_models()
-        return models["ExtractionResult"].model_json_schema()
+        self._json_schema = models["ExtractionResult"].model_json_schema()
+        return self._json_schema
 
 
 @lru_cache(maxsize=1)
@@ -236,3 +269,4 @@ def get_schema_factory() -> SchemaFactory:
 def clear_schema_factory_cache() -> None:
     """Clear the schema factory cache. Call this if you need to reload the ontology."""
     get_schema_factory.cache_clear()
+    _parse_ontology.cache_clear()
@@ -5,16 +5,27 @@ Verwaltet SQLAlchemy Engine Connections zu externen Datenbanken.
 
 import logging
 import os
+import threading
 from functools import lru_cache
 from typing import Dict
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
-from app.services.metadata_store import metadata_service
+from app.services.metadata_store import metadata_service, reset_metadata_service
 
 logger = logging.getLogger(__name__)
 
+# Default Pool-Settings, überschreibbar per `pool:` Block in external_sources.yaml
+DEFAULT_POOL_SETTINGS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_recycle": 1800,
+    "pool_timeout": 30,
+    "pre_ping": True,
+    "prewarm": False,
+}
+
 
 class SQLConnectorService:
     """
@@ -25,7 +36,9 @@ class SQLConnectorService:
     def __init__(self):
         """Initialisiert den SQLConnectorService."""
         self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
         self._metadata_service = metadata_service()
+        self._source_ids_cache: list[str] | None = None
 
     def get_engine(self, source_id: str) -> Engine:
         """
@@ -45,18 +58,42 @@ class SQLConnectorService:
             ValueError: Wenn die Source nicht gefunden wurde
             RuntimeError: Wenn die Connection URL nicht gesetzt ist
         """
-        # Prüfe ob Engine bereits gecached ist
-        if source_id in self._engines:
+        # Prüfe ob Engine bereits gecached ist (Fast-Path ohne Lock)
+        engine = self._engines.get(source_id)
+        if engine is not None:
             logger.debug(f"♻️ Using cached engine for source: {source_id}")
-            return self._engines[source_id]
-        
+            return engine
+
+        with self._lock:
+            # Erneut prüfen: ein anderer Thread kann die Engine inzwischen erstellt haben
+            engine = self._engines.get(source_id)
+            if engine is not None:
+                return engine
+            engine, prewarm = self._create_engine(source_id)
+
+        # Außerhalb des Locks vorwärmen: eine langsame oder unerreichbare Source
+        # blockiert sonst die Engine-Erstellung aller anderen Sources
+        if prewarm:
+            self._prewarm_engine(source_id, engine)
+        return engine
+
+    def _create_engine(self, source_id: str) -> tuple[Engine, bool]:
+        """
+        Erstellt und cached eine neue Engine. Muss unter self._lock aufgerufen werden.
+
+        Args:
+            source_id: Die ID der Datenquelle aus external_sources.yaml
+
+        Returns:
+            Tuple aus SQLAlchemy Engine und ob sie vorgewärmt werden soll
+        """
         # Hole Source Config aus Metadata Service
         source = self._metadata_service.get_source_by_id(source_id)
         if not source:
             raise ValueError(f"Source '{source_id}' nicht in external_sources.yaml gefunden")
         
         # Hole Connection URL aus Environment Variable
-        connection_env = source.get("connection_env")
+        connection_env = source.connection_env
         if not connection_env:
             raise ValueError(f"Keine 'connection_env' für Source '{source_id}' definiert")
         
@@ -67,20 +104,41 @@ class SQLConnectorService:
                 f"Bitte setze sie in der .env Datei."
             )
         
+        # Pool-Settings pro Source (OLTP vs. Warehouse brauchen unterschiedliche Pools)
+        pool = {**DEFAULT_POOL_SETTINGS, **(source.pool or {})}
+
         # Erstelle Engine
         logger.info(f"🔌 Creating new SQL engine for source: {source_id}")
         engine = create_engine(
             connection_url,
-            pool_pre_ping=True,  # Test connection before using
-            pool_size=5,
-            max_overflow=10,
+            pool_pre_ping=pool["pre_ping"],  # Test connection before using
+            pool_size=pool["pool_size"],
+            max_overflow=pool["max_overflow"],
+            pool_recycle=pool["pool_recycle"],  # Idle-Connections vor Server-Timeout erneuern
+            pool_timeout=pool["pool_timeout"],
         )
         
         # Cache die Engine
         self._engines[source_id] = engine
         
         logger.info(f"✅ SQL engine created and cached for: {source_id}")
-        return engine
+        return engine, pool["prewarm"]
+
+    def _prewarm_engine(self, source_id: str, engine: Engine) -> None:
+        """
+        Öffnet eine Connection, damit der erste Request nicht den kompletten
+        TCP/TLS/Auth-Handshake bezahlt. Fehler werden nur geloggt.
+
+        Args:
+            source_id: Die ID der Datenquelle (für Logging)
+            engine: Die frisch erstellte Engine
+        """
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            logger.debug(f"🔥 Prewarmed connection pool for: {source_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Prewarm failed for {source_id}: {e}")
 
     def get_all_source_ids(self) -> list[str]:
         """
@@ -89,7 +147,26 @@ class SQLConnectorService:
         Returns:
             Liste aller Source IDs aus der Konfiguration
         """
-        return [source.get("id") for source in self._metadata_service.get_all_sources()]
+        # Source Catalog ist nach dem Laden statisch
+        if self._source_ids_cache is None:
+            self._source_ids_cache = [
+                source.id for source in self._metadata_service.get_all_sources()
+            ]
+        # Kopie, damit Aufrufer den Cache nicht verändern können
+        return list(self._source_ids_cache)
+
+    def reload_sources(self) -> None:
+        """
+        Lädt den Source Catalog neu und verwirft gecachte Source IDs und Engines.
+
+        Die Engines werden geschlossen, da sich Connection-Settings geändert
+        haben können; neue Engines entwerten auch die Schema-Cache-Einträge
+        von get_sql_schema (diese gelten nur für ihre Engine).
+        """
+        self._source_ids_cache = None
+        reset_metadata_service()
+        self._metadata_service = metadata_service()
+        self.close_all()
 
     def close_all(self) -> None:
         """
@@ -97,14 +174,16 @@ class SQLConnectorService:
         Sollte beim Shutdown der Anwendung aufgerufen werden.
         """
         logger.info("🔌 Closing all SQL engines")
-        for source_id, engine in self._engines.items():
+        with self._lock:
+            engines = list(self._engines.items())
+            self._engines.clear()
+
+        for source_id, engine in engines:
             try:
                 engine.dispose()
                 logger.debug(f"✅ Closed engine for: {source_id}")
             except Exception as e:
                 logger.error(f"❌ Error closing engine for {source_id}: {e}")
-        
-        self._engines.clear()
 
 
 @lru_cache
@@ -6,12 +6,15 @@ Uses boto3 with run_in_executor for async compatibility.
 """
 
 import asyncio
+import atexit
+import os
+import time
 from concurrent.futures import ThreadPoolExecutor
-from functools import partial
-from io import BytesIO
+from functools import lru_cache, partial
 from urllib.parse import quote
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from fastapi import UploadFile
@@ -20,8 +23,39 @@ from app.core.config import get_settings
 
 settings = get_settings()
 
-# Thread pool for running blocking boto3 operations
-_executor = ThreadPoolExecutor(max_workers=4)
+# Thread pool for running blocking boto3 operations.
+# boto3 calls are I/O-bound, so size well above the CPU count.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.minio_max_concurrency or min(32, (os.cpu_count() or 4) * 4),
+    thread_name_prefix="minio-io",
+)
+atexit.register(_executor.shutdown, wait=False)
+
+# Presigned URLs are reused for this long, so callers always receive a URL
+# with at least (expires_in - _PRESIGNED_URL_REUSE_SECONDS) of validity left.
+_PRESIGNED_URL_REUSE_SECONDS = 60
+_PRESIGNED_URL_CACHE_MAX = 1024
+
+# Percent-encoder for the original_filename metadata header (S3 metadata must
+# be ASCII); cached since the same filenames recur across re-uploads.
+_quote_filename = lru_cache(maxsize=1024)(quote)
+
+# Buckets verified to exist in this process (existence never changes at runtime)
+_bucket_verified: dict[str, bool] = {}
+
+# Multipart transfer settings for streamed uploads (parts are sent concurrently)
+_UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+# Multipart transfer settings for downloads above multipart_threshold (parallel range GETs)
+_DOWNLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
 
 
 class MinioService:
@@ -47,10 +81,11 @@ class MinioService:
             region_name="us-east-1",  # MinIO default
         )
         self.bucket = settings.minio_bucket_name
+        self._presigned_urls: dict[tuple[str, str, int], tuple[str, float]] = {}
 
     async def _run_sync(self, func, *args, **kwargs):
         """Run a synchronous function in the thread pool."""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
             _executor, partial(func, *args, **kwargs)
         )
@@ -60,6 +95,9 @@ class MinioService:
         Ensure the bucket exists, create if it doesn't.
         Should be called during application startup.
         """
+        if _bucket_verified.get(self.bucket):
+            return
+
         try:
             await self._run_sync(self.client.head_bucket, Bucket=self.bucket)
             print(f"   ✓ MinIO bucket '{self.bucket}' exists")
@@ -71,6 +109,8 @@ class MinioService:
             else:
                 raise
 
+        _bucket_verified[self.bucket] = True
+
     async def upload_file(
         self,
         file: UploadFile,
@@ -78,6 +118,9 @@ class MinioService:
     ) -> str:
         """
         Upload a file to MinIO storage.
+
+        The underlying file object is streamed with a multipart upload, so the
+        payload is never held in memory as a whole.
         
         Args:
             file: FastAPI UploadFile object (cursor should be at position 0)
@@ -86,17 +129,18 @@ class MinioService:
         Returns:
             The object_name (storage path) for reference
         """
-        content = await file.read()
         content_type = file.content_type or "application/octet-stream"
 
         await self._run_sync(
-            self.client.put_object,
+            self.client.upload_fileobj,
+            file.file,
             Bucket=self.bucket,
             Key=object_name,
-            Body=BytesIO(content),
-            ContentType=content_type,
-            ContentLength=len(content),
-            Metadata={"original_filename": quote(file.filename or "unknown")},
+            ExtraArgs={
+                "ContentType": content_type,
+                "Metadata": {"original_filename": _quote_filename(file.filename or "unknown")},
+            },
+            Config=_UPLOAD_TRANSFER_CONFIG,
         )
 
         return object_name
@@ -124,10 +168,10 @@ class MinioService:
             self.client.put_object,
             Bucket=self.bucket,
             Key=object_name,
-            Body=BytesIO(content),
+            Body=content,
             ContentType=content_type,
             ContentLength=len(content),
-            Metadata={"original_filename": quote(filename)},
+            Metadata={"original_filename": _quote_filename(filename)},
         )
 
         return object_name
@@ -142,12 +186,50 @@ class MinioService:
         Returns:
             Raw bytes of the file
         """
-        response = await self._run_sync(
-            self.client.get_object,
-            Bucket=self.bucket,
-            Key=object_name,
-        )
-        return response["Body"].read()
+        return await self._run_sync(self._download_sync, object_name)
+
+    def _download_sync(self, object_name: str) -> bytes:
+        """
+        Blocking download: the first multipart_threshold bytes come from one
+        ranged GET that also reports the object size, so small objects need a
+        single request (download_fileobj always sends a HEAD first). The rest of
+        a larger object is fetched as parallel range GETs of multipart_chunksize.
+        """
+        threshold = _DOWNLOAD_TRANSFER_CONFIG.multipart_threshold
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket, Key=object_name, Range=f"bytes=0-{threshold - 1}"
+            )
+        except ClientError as e:
+            # Ranged GET on an empty object: 416 InvalidRange
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                return b""
+            raise
+        with response["Body"] as body:
+            head = body.read()
+
+        # "bytes 0-<end>/<total>"
+        total_size = int(response["ContentRange"].rsplit("/", 1)[1])
+        if total_size <= len(head):
+            return head
+
+        chunk_size = _DOWNLOAD_TRANSFER_CONFIG.multipart_chunksize
+        ranges = [
+            f"bytes={start}-{min(start + chunk_size, total_size) - 1}"
+            for start in range(len(head), total_size, chunk_size)
+        ]
+
+        def fetch(byte_range: str) -> bytes:
+            # IfMatch: fail instead of mixing parts of a concurrently replaced object
+            part = self.client.get_object(
+                Bucket=self.bucket, Key=object_name, Range=byte_range, IfMatch=response["ETag"]
+            )
+            with part["Body"] as part_body:
+                return part_body.read()
+
+        # Own short-lived pool: the shared executor already runs this call
+        with ThreadPoolExecutor(max_workers=_DOWNLOAD_TRANSFER_CONFIG.max_concurrency) as pool:
+            return b"".join([head, *pool.map(fetch, ranges)])
 
     async def delete_file(self, object_name: str) -> None:
         """
@@ -175,12 +257,24 @@ class MinioService:
         Returns:
             Presigned URL string
         """
+        # Reuse a recently signed URL instead of re-signing (HMAC chain)
+        cache_key = (self.bucket, object_name, expires_in)
+        now = time.monotonic()
+        cached = self._presigned_urls.get(cache_key)
+        if cached is not None and now - cached[1] < _PRESIGNED_URL_REUSE_SECONDS:
+            return cached[0]
+
         url = await self._run_sync(
             self.client.generate_presigned_url,
             "get_object",
             Params={"Bucket": self.bucket, "Key": object_name},
             ExpiresIn=expires_in,
         )
+
+        if expires_in > 2 * _PRESIGNED_URL_REUSE_SECONDS:
+            if len(self._presigned_urls) >= _PRESIGNED_URL_CACHE_MAX:
+                self._presigned_urls.clear()
+            self._presigned_urls[cache_key] = (url, now)
         return url
 
     async def file_exists(self, object_name: str) -> bool:
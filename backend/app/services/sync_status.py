@@ -4,6 +4,7 @@ Allows monitoring of CRM sync progress via API.
 """
 
 import logging
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 from enum import Enum
@@ -25,93 +26,95 @@ class SyncPhase(str, Enum):
 
 class SyncStatusTracker:
     """
-    Singleton to track sync status across requests.
+    Tracks sync status across requests.
     Allows real-time monitoring via API.
+
+    Counters are kept as flat slot attributes so the hot ``update_*`` calls
+    made from the sync loop are plain attribute updates; the nested status
+    dict is only assembled in ``get_status``.
     """
-    
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
-    
-    def _initialize(self):
-        """Initialize status tracking."""
-        self.status = {
-            "phase": SyncPhase.IDLE,
-            "started_at": None,
-            "current_step": "Waiting to start...",
-            "progress": {
-                "entities_fetched": 0,
-                "entities_processed": 0,
-                "nodes_created": 0,
-                "nodes_updated": 0,
-                "relationships_created": 0,
-                "relationships_failed": 0,
-                "current_entity_type": None,
-                "current_label": None,
-            },
-            "errors": [],
-            "completed_at": None,
-            "duration_seconds": 0
-        }
-    
+
+    __slots__ = (
+        "phase",
+        "started_at",
+        "_started_monotonic",
+        "current_step",
+        "_entities_fetched",
+        "_entities_processed",
+        "_nodes_created",
+        "_nodes_updated",
+        "_rels_created",
+        "_rels_failed",
+        "current_entity_type",
+        "current_label",
+        "errors",
+        "completed_at",
+        "duration_seconds",
+    )
+
+    def __init__(self):
+        self._reset(SyncPhase.IDLE, "Waiting to start...")
+
+    def _reset(self, phase: SyncPhase, step: str, started_at: Optional[str] = None):
+        """Reset all tracking fields."""
+        self.phase = phase
+        self.started_at = started_at
+        self._started_monotonic: Optional[float] = None
+        self.current_step = step
+        self._entities_fetched = 0
+        self._entities_processed = 0
+        self._nodes_created = 0
+        self._nodes_updated = 0
+        self._rels_created = 0
+        self._rels_failed = 0
+        self.current_entity_type = None
+        self.current_label = None
+        self.errors = []
+        self.completed_at = None
+        self.duration_seconds = 0
+
     def start_sync(self):
         """Mark sync as started."""
-        self.status = {
-            "phase": SyncPhase.FETCHING,
-            "started_at": datetime.now().isoformat(),
-            "current_step": "Starting CRM synchronization...",
-            "progress": {
-                "entities_fetched": 0,
-                "entities_processed": 0,
-                "nodes_created": 0,
-                "nodes_updated": 0,
-                "relationships_created": 0,
-                "relationships_failed": 0,
-                "current_entity_type": None,
-                "current_label": None,
-            },
-            "errors": [],
-            "completed_at": None,
-            "duration_seconds": 0
-        }
+        self._reset(
+            SyncPhase.FETCHING,
+            "Starting CRM synchronization...",
+            started_at=datetime.now().isoformat(),
+        )
+        self._started_monotonic = time.monotonic()
         logger.info("🚀 SYNC STARTED - Status tracking enabled")
     
     def update_phase(self, phase: SyncPhase, step: str):
         """Update current phase."""
-        self.status["phase"] = phase
-        self.status["current_step"] = step
+        self.phase = phase
+        self.current_step = step
         logger.info(f"📍 PHASE: {phase.value.upper()} - {step}")
     
     def update_fetching(self, entity_type: str, count: int):
         """Update fetching progress."""
-        self.status["progress"]["current_entity_type"] = entity_type
-        self.status["progress"]["entities_fetched"] = count
-        self.status["current_step"] = f"Fetching {entity_type}... ({count} records)"
+        self.current_entity_type = entity_type
+        self._entities_fetched = count
+        self.current_step = f"Fetching {entity_type}... ({count} records)"
         logger.info(f"📥 FETCHING: {entity_type} - {count} records fetched")
     
     def update_node_processing(self, label: str, created: int, updated: int):
         """Update node processing progress."""
-        self.status["progress"]["current_label"] = label
-        self.status["progress"]["nodes_created"] += created
-        self.status["progress"]["nodes_updated"] += updated
-        total = self.status["progress"]["nodes_created"] + self.status["progress"]["nodes_updated"]
-        self.status["current_step"] = f"Processing {label} nodes... ({created} created, {updated} updated)"
+        self.current_label = label
+        self._nodes_created += created
+        self._nodes_updated += updated
+        total = self._nodes_created + self._nodes_updated
+        self.current_step = f"Processing {label} nodes... ({created} created, {updated} updated)"
         logger.info(f"📦 NODES: {label} - Created: {created}, Updated: {updated}, Total: {total}")
     
     def update_relationship_processing(self, rel_type: str, count: int):
         """Update relationship processing progress."""
-        self.status["progress"]["relationships_created"] += count
-        total = self.status["progress"]["relationships_created"]
-        self.status["current_step"] = f"Creating {rel_type} relationships... ({count} created)"
+        self._rels_created += count
+        total = self._rels_created
+        self.current_step = f"Creating {rel_type} relationships... ({count} created)"
         logger.info(f"🔗 RELATIONSHIPS: {rel_type} - Created: {count}, Total so far: {total}")
     
     def add_error(self, error: str):
         """Add error to tracking."""
-        self.status["errors"].append({
+        self.errors.append({
             "timestamp": datetime.now().isoformat(),
             "error": error
         })
@@ -119,35 +122,50 @@ class SyncStatusTracker:
     
     def complete_sync(self, success: bool = True):
         """Mark sync as completed."""
-        self.status["phase"] = SyncPhase.COMPLETED if success else SyncPhase.ERROR
-        self.status["completed_at"] = datetime.now().isoformat()
+        self.phase = SyncPhase.COMPLETED if success else SyncPhase.ERROR
+        self.completed_at = datetime.now().isoformat()
         
         # Calculate duration
-        if self.status["started_at"]:
-            start = datetime.fromisoformat(self.status["started_at"])
-            end = datetime.fromisoformat(self.status["completed_at"])
-            self.status["duration_seconds"] = (end - start).total_seconds()
+        if self._started_monotonic is not None:
+            self.duration_seconds = time.monotonic() - self._started_monotonic
         
         if success:
-            self.status["current_step"] = "✅ Sync completed successfully!"
-            logger.info(f"✅ SYNC COMPLETED - Duration: {self.status['duration_seconds']:.1f}s")
+            self.current_step = "✅ Sync completed successfully!"
+            logger.info(f"✅ SYNC COMPLETED - Duration: {self.duration_seconds:.1f}s")
             logger.info(f"📊 FINAL STATS:")
-            logger.info(f"   Nodes: {self.status['progress']['nodes_created']} created, {self.status['progress']['nodes_updated']} updated")
-            logger.info(f"   Relationships: {self.status['progress']['relationships_created']} created")
+            logger.info(f"   Nodes: {self._nodes_created} created, {self._nodes_updated} updated")
+            logger.info(f"   Relationships: {self._rels_created} created")
         else:
-            self.status["current_step"] = "❌ Sync failed with errors"
+            self.current_step = "❌ Sync failed with errors"
             logger.error("❌ SYNC FAILED")
     
     def get_status(self) -> Dict[str, Any]:
         """Get current status."""
-        return self.status.copy()
+        return {
+            "phase": self.phase,
+            "started_at": self.started_at,
+            "current_step": self.current_step,
+            "progress": {
+                "entities_fetched": self._entities_fetched,
+                "entities_processed": self._entities_processed,
+                "nodes_created": self._nodes_created,
+                "nodes_updated": self._nodes_updated,
+                "relationships_created": self._rels_created,
+                "relationships_failed": self._rels_failed,
+                "current_entity_type": self.current_entity_type,
+                "current_label": self.current_label,
+            },
+            "errors": list(self.errors),
+            "completed_at": self.completed_at,
+            "duration_seconds": self.duration_seconds,
+        }
     
     def is_running(self) -> bool:
         """Check if sync is currently running."""
-        return self.status["phase"] not in [SyncPhase.IDLE, SyncPhase.COMPLETED, SyncPhase.ERROR]
+        return self.phase not in (SyncPhase.IDLE, SyncPhase.COMPLETED, SyncPhase.ERROR)
 
 
-# Singleton instance
+# Module-level instance shared across requests
 sync_status = SyncStatusTracker()
 
 
@@ -5,23 +5,75 @@ Stores document chunks with their embeddings in PostgreSQL using pgvector.
 Supports OpenAI-compatible embedding APIs (e.g., Trooper/Jina).
 """
 
-import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from functools import partial
+import math
+from collections import OrderedDict
 from typing import List, Tuple
 
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from langchain_postgres import PGVector
+from langchain_postgres.vectorstores import DistanceStrategy
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
 
 from app.core.config import VECTOR_COLLECTION_NAME, get_settings
+from app.utils.text import shorten
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Thread pool for running blocking operations
-_executor = ThreadPoolExecutor(max_workers=2)
+# Vector indexes on the langchain-postgres embedding table (cosine distance)
+HNSW_INDEX_NAME = "idx_langchain_pg_embedding_hnsw"
+IVFFLAT_INDEX_NAME = "idx_langchain_pg_embedding_ivfflat"
+BINARY_INDEX_NAME = "idx_langchain_pg_embedding_binary_hnsw"
+
+# Upper limit pgvector accepts for hnsw.ef_search
+HNSW_MAX_EF_SEARCH = 1000
+
+# Metadata keys promoted to generated, B-tree indexed columns for fast filtering
+FILTER_COLUMNS = ("document_id", "filename")
+
+# Max cached query embeddings (LRU); saves an embedding API round-trip per hit
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+
+# HNSW parameters by collection size: (max_rows, m, ef_construction, ef_search)
+_HNSW_TIERS = (
+    (100_000, 16, 64, 40),
+    (1_000_000, 24, 100, 100),
+)
+
+
+def configure_hnsw_params(vector_count: int) -> dict:
+    """
+    Select vector index parameters based on the number of stored vectors.
+
+    Small collections get a lean HNSW graph, medium ones a denser graph with a
+    wider search beam. Above 1M rows an IVFFlat index with sqrt(n) lists is used.
+    Explicit HNSW_* settings override the automatic HNSW values.
+
+    Args:
+        vector_count: Number of rows in langchain_pg_embedding
+
+    Returns:
+        Dict with "index_type" plus either m/ef_construction/ef_search (hnsw)
+        or lists/probes (ivfflat)
+    """
+    for max_rows, m, ef_construction, ef_search in _HNSW_TIERS:
+        if vector_count <= max_rows:
+            return {
+                "index_type": "hnsw",
+                "m": settings.hnsw_m or m,
+                "ef_construction": settings.hnsw_ef_construction or ef_construction,
+                "ef_search": settings.hnsw_ef_search or ef_search,
+            }
+
+    lists = int(math.sqrt(vector_count))
+    return {
+        "index_type": "ivfflat",
+        "lists": lists,
+        "probes": max(1, int(math.sqrt(lists))),
+    }
 
 
 class VectorStoreService:
@@ -42,30 +94,251 @@ class VectorStoreService:
             openai_api_key=settings.embedding_api_key,
             model=settings.embedding_model,
             check_embedding_ctx_length=False,  # Required for non-OpenAI models
+            chunk_size=settings.embedding_batch_size,  # Texts per embedding request
         )
 
-        # Build connection string for PGVector (sync driver)
+        # Build connection string for PGVector (psycopg async driver)
         connection_string = (
             f"postgresql+psycopg://{settings.postgres_user}:{settings.postgres_password}"
             f"@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_db}"
         )
 
+        # Own the engine so search parameters can be applied per connection
+        self._index_params = configure_hnsw_params(0)
+        self._filter_columns_ready = False
+        self._binary_index_ready = False
+        self._ef_search_clamp_logged = False
+        self._query_embeddings: OrderedDict[tuple[str, str], List[float]] = OrderedDict()
+        self._engine = create_async_engine(
+            connection_string,
+            pool_pre_ping=True,
+            pool_size=settings.vector_pool_size,
+            max_overflow=settings.vector_pool_max_overflow,
+            pool_recycle=settings.vector_pool_recycle,
+        )
+        event.listen(self._engine.sync_engine, "connect", self._apply_search_params)
+
         # IMPORTANT: Use consistent collection_name for both read and write
+        # embedding_length gives the column a fixed dimension (required for HNSW)
+        # An AsyncEngine puts PGVector in async mode (tables are created lazily)
+        # Cosine distance (<=>) must match the *_cosine_ops index operator class
         self.vector_store = PGVector(
             embeddings=self.embeddings,
             collection_name=VECTOR_COLLECTION_NAME,
-            connection=connection_string,
+            connection=self._engine,
+            embedding_length=settings.embedding_dimensions,
+            distance_strategy=DistanceStrategy.COSINE,
             use_jsonb=True,
         )
 
         logger.info(f"VectorStoreService initialized with collection: {VECTOR_COLLECTION_NAME}")
 
-    async def _run_sync(self, func, *args, **kwargs):
-        """Run a synchronous function in the thread pool."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            _executor, partial(func, *args, **kwargs)
+    def _apply_search_params(self, dbapi_connection, connection_record) -> None:
+        """Set index search parameters on each new pooled connection."""
+        index_type = self._index_params["index_type"]
+        if index_type == "ivfflat":
+            statements = [f"SET ivfflat.probes = {int(self._index_params['probes'])}"]
+        else:
+            # The binary first pass needs a search beam at least as wide as its candidate list
+            ef_search = max(self._index_params["ef_search"], settings.vector_binary_candidates or 0)
+            if ef_search > HNSW_MAX_EF_SEARCH:
+                # pgvector rejects larger values, which would fail every new connection
+                if not self._ef_search_clamp_logged:
+                    logger.warning(
+                        f"hnsw.ef_search {ef_search} exceeds pgvector's maximum, "
+                        f"using {HNSW_MAX_EF_SEARCH} (check VECTOR_BINARY_CANDIDATES/HNSW_EF_SEARCH)"
+                    )
+                    self._ef_search_clamp_logged = True
+                ef_search = HNSW_MAX_EF_SEARCH
+            statements = [f"SET hnsw.ef_search = {int(ef_search)}"]
+
+        # Keep scanning the index until enough rows pass the metadata filter
+        iterative_scan = settings.vector_iterative_scan
+        if iterative_scan == "strict_order" and index_type == "ivfflat":
+            # ivfflat.iterative_scan only accepts off/relaxed_order
+            logger.warning("VECTOR_ITERATIVE_SCAN=strict_order is HNSW-only, using relaxed_order for IVFFlat")
+            iterative_scan = "relaxed_order"
+        if iterative_scan in ("relaxed_order", "strict_order"):
+            statements.append(f"SET {index_type}.iterative_scan = {iterative_scan}")
+
+        # Run in autocommit so the SET survives a rollback of the first transaction
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+        dbapi_connection.autocommit = autocommit
+
+    async def ensure_index(self) -> None:
+        """
+        Create the metadata filter columns and the vector index if they don't exist.
+        Index type and parameters are chosen from the current collection size.
+        Should be called during application startup.
+        """
+        # Creates extension, tables and collection (PGVector's lazy async init)
+        await self.vector_store.acreate_collection()
+
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+        async with self._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await self._create_filter_columns(conn)
+
+            if not settings.embedding_dimensions:
+                logger.info("EMBEDDING_DIMENSIONS not set - skipping vector index creation")
+                return
+            await self._apply_build_settings(conn)
+            params = await self._create_vector_index(conn)
+            if settings.vector_binary_candidates:
+                await self._create_binary_index(conn)
+
+        # Recycle pooled connections so they pick up the new search parameters
+        self._index_params = params
+        await self._engine.dispose()
+
+    async def rebuild_index(self) -> None:
+        """
+        Rebuild the active vector index concurrently.
+
+        Useful after large bulk loads or after switching to halfvec, since
+        incremental inserts degrade HNSW graph quality over time.
+        """
+        index_name = (
+            IVFFLAT_INDEX_NAME if self._index_params["index_type"] == "ivfflat" else HNSW_INDEX_NAME
         )
+        async with self._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await self._apply_build_settings(conn)
+            await conn.execute(text(f"REINDEX INDEX CONCURRENTLY {index_name}"))
+
+        logger.info(f"Vector index rebuilt: {index_name}")
+
+    async def _apply_build_settings(self, conn: AsyncConnection) -> None:
+        """Enable parallel, memory-backed index builds for this session."""
+        await conn.execute(text(
+            f"SET max_parallel_maintenance_workers = {int(settings.vector_index_build_workers)}"
+        ))
+        if settings.vector_index_build_memory:
+            await conn.execute(
+                text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                {"value": settings.vector_index_build_memory},
+            )
+
+    async def _create_filter_columns(self, conn: AsyncConnection) -> None:
+        """
+        Promote hot metadata keys to generated columns with B-tree indexes.
+
+        Filtering on cmetadata->>'key' has poor selectivity estimates; plain
+        indexed columns let deletes and filters use an index scan.
+
+        Opt-in (VECTOR_FILTER_COLUMNS): adding a STORED generated column rewrites
+        the whole table under an ACCESS EXCLUSIVE lock. Without the setting,
+        columns created by an earlier opt-in run are still used.
+        """
+        if not settings.vector_filter_columns:
+            existing = (await conn.execute(
+                text(
+                    "SELECT count(*) FROM pg_attribute "
+                    "WHERE attrelid = 'langchain_pg_embedding'::regclass "
+                    "AND attname = ANY(:names) AND NOT attisdropped"
+                ),
+                {"names": list(FILTER_COLUMNS)},
+            )).scalar()
+            self._filter_columns_ready = existing == len(FILTER_COLUMNS)
+            return
+
+        for key in FILTER_COLUMNS:
+            await conn.execute(text(
+                f"ALTER TABLE langchain_pg_embedding ADD COLUMN IF NOT EXISTS {key} text "
+                f"GENERATED ALWAYS AS (cmetadata->>'{key}') STORED"
+            ))
+            await conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_langchain_pg_embedding_{key} "
+                f"ON langchain_pg_embedding ({key})"
+            ))
+        self._filter_columns_ready = True
+
+    async def _create_vector_index(self, conn: AsyncConnection) -> dict:
+        """
+        Create the HNSW/IVFFlat index and drop an index of the other type.
+        Requires EMBEDDING_DIMENSIONS.
+
+        Returns:
+            The index parameters chosen for the current collection size
+        """
+        if settings.embedding_halfvec:
+            await self._migrate_to_halfvec(conn)
+        opclass = "halfvec_cosine_ops" if settings.embedding_halfvec else "vector_cosine_ops"
+
+        vector_count = (await conn.execute(
+            text("SELECT count(*) FROM langchain_pg_embedding")
+        )).scalar() or 0
+        params = configure_hnsw_params(vector_count)
+
+        if params["index_type"] == "ivfflat":
+            index_name, other_index_name = IVFFLAT_INDEX_NAME, HNSW_INDEX_NAME
+            statement = (
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {IVFFLAT_INDEX_NAME} "
+                f"ON langchain_pg_embedding USING ivfflat (embedding {opclass}) "
+                f"WITH (lists = {int(params['lists'])})"
+            )
+        else:
+            index_name, other_index_name = HNSW_INDEX_NAME, IVFFLAT_INDEX_NAME
+            statement = (
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {HNSW_INDEX_NAME} "
+                f"ON langchain_pg_embedding USING hnsw (embedding {opclass}) "
+                f"WITH (m = {int(params['m'])}, "
+                f"ef_construction = {int(params['ef_construction'])})"
+            )
+        await conn.execute(text(statement))
+
+        # After a type switch (collection crossed a size tier) drop the previous
+        # index, only once the new one exists: otherwise every insert maintains
+        # both and the planner may keep using the old one with stale search params
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {other_index_name}"))
+
+        logger.info(f"Vector index ready: {index_name} {params} ({vector_count} vectors)")
+        return params
+
+    async def _create_binary_index(self, conn: AsyncConnection) -> None:
+        """
+        Create an HNSW index over the binary-quantized embeddings (Hamming distance).
+
+        Used as the first pass of similarity_search when VECTOR_BINARY_CANDIDATES is set.
+        """
+        dims = int(settings.embedding_dimensions)
+        await conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {BINARY_INDEX_NAME} "
+            f"ON langchain_pg_embedding USING hnsw ((binary_quantize(embedding)::bit({dims})) bit_hamming_ops)"
+        ))
+        self._binary_index_ready = True
+        logger.info(f"Binary quantized index ready: {BINARY_INDEX_NAME}")
+
+    async def _migrate_to_halfvec(self, conn: AsyncConnection) -> None:
+        """
+        Convert the embedding column from vector(N) to halfvec(N) if needed.
+
+        Existing vector indexes are dropped first (their operator class doesn't
+        apply to halfvec) and recreated by the caller. Queries keep working
+        unchanged: pgvector resolves the query literal to halfvec.
+        """
+        column_type = (await conn.execute(text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'langchain_pg_embedding'::regclass AND attname = 'embedding'"
+        ))).scalar()
+        if not column_type or column_type.startswith("halfvec"):
+            return
+
+        dims = int(settings.embedding_dimensions)
+        logger.info(f"Converting embedding column from {column_type} to halfvec({dims})...")
+        await conn.execute(text(f"DROP INDEX IF EXISTS {HNSW_INDEX_NAME}"))
+        await conn.execute(text(f"DROP INDEX IF EXISTS {IVFFLAT_INDEX_NAME}"))
+        await conn.execute(text(
+            "ALTER TABLE langchain_pg_embedding "
+            f"ALTER COLUMN embedding TYPE halfvec({dims}) USING embedding::halfvec({dims})"
+        ))
 
     async def add_documents(
         self,
@@ -82,18 +355,37 @@ class VectorStoreService:
         Returns:
             List of chunk IDs
         """
-        # Add document_id to metadata of each chunk
-        for chunk in chunks:
-            chunk.metadata["document_id"] = document_id
+        # Build texts and metadata (with document_id) in one pass each,
+        # without mutating the caller's chunks
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [{**chunk.metadata, "document_id": document_id} for chunk in chunks]
 
-        # Run the blocking operation in thread pool
-        ids = await self._run_sync(
-            self.vector_store.add_documents,
-            chunks,
-        )
+        ids = await self.vector_store.aadd_texts(texts, metadatas=metadatas)
         
         return ids
 
+    async def _embed_query(self, query: str) -> List[float]:
+        """
+        Embed a search query, reusing cached embeddings for repeated queries.
+
+        Args:
+            query: Search query string
+
+        Returns:
+            Embedding vector for the query
+        """
+        key = (settings.embedding_model, query)
+        embedding = self._query_embeddings.get(key)
+        if embedding is not None:
+            self._query_embeddings.move_to_end(key)
+            return embedding
+
+        embedding = await self.embeddings.aembed_query(query)
+        self._query_embeddings[key] = embedding
+        if len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+            self._query_embeddings.popitem(last=False)
+        return embedding
+
     async def similarity_search(
         self,
         query: str,
@@ -114,30 +406,38 @@ class VectorStoreService:
         Returns:
             List of matching Document objects (filtered by score if threshold is set)
         """
-        # Use similarity_search_with_score to get distances
-        results_with_scores: List[Tuple[Document, float]] = await self._run_sync(
-            self.vector_store.similarity_search_with_score,
-            query,
-            k=k,
-            filter=filter_dict,
-        )
+        # Search by (cached) query embedding to get distances
+        embedding = await self._embed_query(query)
+        results_with_scores: List[Tuple[Document, float]]
+        if self._binary_index_ready and not filter_dict:
+            results_with_scores = await self._binary_search_with_score(embedding, k)
+        else:
+            results_with_scores = await self.vector_store.asimilarity_search_with_score_by_vector(
+                embedding,
+                k=k,
+                filter=filter_dict,
+            )
         
-        logger.info(f"Vector search for '{query[:50]}...' returned {len(results_with_scores)} results")
+        logger.info(f"Vector search for '{shorten(query)}' returned {len(results_with_scores)} results")
         
         # Log all scores for debugging
-        for doc, score in results_with_scores:
-            filename = doc.metadata.get("filename", "Unknown")
-            logger.debug(f"  - {filename}: score={score:.4f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for doc, score in results_with_scores:
+                logger.debug("  - %s: score=%.4f", doc.metadata.get("filename", "Unknown"), score)
         
         # Filter by score threshold if specified
+        # Results are sorted by ascending distance, so the first score above
+        # the threshold means every remaining result fails as well.
         if score_threshold is not None:
             filtered_results = []
             for doc, score in results_with_scores:
-                if score <= score_threshold:
-                    filtered_results.append(doc)
-                else:
-                    filename = doc.metadata.get("filename", "Unknown")
-                    logger.warning(f"  ⚠️ Filtered out '{filename}' due to poor score: {score:.4f} > {score_threshold}")
+                if score > score_threshold:
+                    break
+                filtered_results.append(doc)
+            
+            dropped = len(results_with_scores) - len(filtered_results)
+            if dropped:
+                logger.warning(f"  ⚠️ Filtered out {dropped} results due to poor score (> {score_threshold})")
             
             logger.info(f"After score filtering: {len(filtered_results)} results (threshold={score_threshold})")
             return filtered_results
@@ -145,18 +445,92 @@ class VectorStoreService:
         # Return all results without filtering
         return [doc for doc, _ in results_with_scores]
 
-    async def delete_by_document_id(self, document_id: str) -> None:
+    async def _binary_search_with_score(
+        self,
+        embedding: List[float],
+        k: int,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Two-stage search: Hamming distance over binary-quantized vectors picks
+        VECTOR_BINARY_CANDIDATES candidates, which are re-ranked by exact cosine distance.
+
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+
+        Returns:
+            List of (Document, cosine distance) tuples, best match first
+        """
+        dims = int(settings.embedding_dimensions)
+        vector_type = f"halfvec({dims})" if settings.embedding_halfvec else f"vector({dims})"
+        statement = text(f"""
+            WITH candidates AS (
+                SELECT e.id
+                FROM langchain_pg_embedding e
+                JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+                WHERE c.name = :collection_name
+                ORDER BY binary_quantize(e.embedding)::bit({dims})
+                    <~> binary_quantize(CAST(:embedding AS {vector_type}))
+                LIMIT :candidates
+            )
+            SELECT e.id, e.document, e.cmetadata,
+                   e.embedding <=> CAST(:embedding AS {vector_type}) AS distance
+            FROM langchain_pg_embedding e
+            JOIN candidates USING (id)
+            ORDER BY distance
+            LIMIT :k
+        """)
+        async with self._engine.connect() as conn:
+            result = await conn.execute(statement, {
+                "collection_name": VECTOR_COLLECTION_NAME,
+                "embedding": str(embedding),
+                "candidates": max(settings.vector_binary_candidates, k),
+                "k": k,
+            })
+            rows = result.all()
+
+        return [
+            (Document(id=str(row.id), page_content=row.document, metadata=row.cmetadata), row.distance)
+            for row in rows
+        ]
+
+    async def _delete_by_metadata(self, key: str, value: str) -> int:
+        """
+        Delete all chunks of this collection whose metadata key equals value.
+
+        Runs a single DELETE ... RETURNING, so the count is exact. Uses the indexed generated column
+        when available, otherwise the JSONB expression on cmetadata.
+
+        Args:
+            key: Metadata key (one of FILTER_COLUMNS)
+            value: Value to match
+
+        Returns:
+            Number of deleted chunks
+        """
+        column = key if self._filter_columns_ready else f"cmetadata->>'{key}'"
+        async with self._engine.begin() as conn:
+            result = await conn.execute(
+                text(
+                    f"DELETE FROM langchain_pg_embedding WHERE {column} = :value "
+                    "AND collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = :collection) "
+                    "RETURNING id"
+                ),
+                {"value": value, "collection": VECTOR_COLLECTION_NAME},
+            )
+            return len(result.fetchall())
+
+    async def delete_by_document_id(self, document_id: str) -> int:
         """
         Delete all chunks for a specific document.
 
         Args:
             document_id: The document ID to delete chunks for
+
+        Returns:
+            Number of deleted chunks
         """
-        # Use filter to find and delete
-        await self._run_sync(
-            self.vector_store.delete,
-            filter={"document_id": document_id},
-        )
+        return await self._delete_by_metadata("document_id", document_id)
 
     async def delete_by_filename(self, filename: str) -> int:
         """
@@ -166,18 +540,14 @@ class VectorStoreService:
             filename: The filename to delete chunks for
 
         Returns:
-            Number of deleted chunks (approximate)
+            Number of deleted chunks
         """
         logger.info(f"Deleting vectors for filename: {filename}")
 
-        # Use filter to find and delete by filename in metadata
         try:
-            await self._run_sync(
-                self.vector_store.delete,
-                filter={"filename": filename},
-            )
-            logger.info(f"Deleted vectors for filename: {filename}")
-            return 1  # PGVector doesn't return count, return 1 on success
+            deleted = await self._delete_by_metadata("filename", filename)
+            logger.info(f"Deleted {deleted} vectors for filename: {filename}")
+            return deleted
         except Exception as e:
             logger.error(f"Failed to delete vectors for {filename}: {e}")
             raise
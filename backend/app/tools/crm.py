@@ -3,6 +3,7 @@ CRM Tools für LangGraph Agents.
 Ermöglicht Zugriff auf Live-Daten aus dem CRM-System.
 """
 
+import asyncio
 import logging
 
 from langchain_core.tools import tool
@@ -65,7 +66,7 @@ async def get_crm_facts(entity_id: str, query_context: str = "") -> str:
 
 
 @tool
-def check_crm_status() -> str:
+async def check_crm_status() -> str:
     """Prüft den Verbindungsstatus zum CRM-System.
     
     Returns:
@@ -84,8 +85,8 @@ def check_crm_status() -> str:
         
         provider_name = provider.get_provider_name()
         
-        # Check connection
-        if provider.check_connection():
+        # Check connection (provider call is sync and may block on network I/O)
+        if await asyncio.to_thread(provider.check_connection):
             result = f"✅ CRM verbunden: {provider_name}"
             logger.info(result)
             return result
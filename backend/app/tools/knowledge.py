@@ -3,6 +3,7 @@ Knowledge Base Tool für LangGraph Agents.
 Kapselt die Hybrid RAG Suche (Vector + Graph).
 """
 
+import asyncio
 import logging
 from typing import Annotated
 
@@ -12,9 +13,13 @@ from app.core.config import VECTOR_COLLECTION_NAME
 from app.prompts import get_prompt
 from app.services.graph_store import GraphStoreService, get_graph_store_service
 from app.services.vector_store import VectorStoreService, get_vector_store_service
+from app.utils.text import shorten
 
 logger = logging.getLogger(__name__)
 
+# Max. Zeichen pro Chunk im Tool-Ergebnis
+MAX_CHUNK_CHARS = 500
+
 # Load tool description from prompts folder
 _TOOL_DESCRIPTION = get_prompt("tool_search_knowledge_base")
 
@@ -34,7 +39,7 @@ async def search_knowledge_base(query: str) -> str:
         Kombinierte Ergebnisse aus Vector Store und Knowledge Graph
     """
     
-    logger.info(f"🔧 Knowledge Tool: Searching for '{query[:80]}...'")
+    logger.info(f"🔧 Knowledge Tool: Searching for '{shorten(query)}'")
     
     # Initialisiere Services
     vector_store = get_vector_store_service()
@@ -42,54 +47,60 @@ async def search_knowledge_base(query: str) -> str:
     
     result_parts = []
     
-    # Teil 1: Vector Search für Textabschnitte
-    try:
-        logger.debug(f"🔍 Vector search in collection: {VECTOR_COLLECTION_NAME}")
-        vector_results = await vector_store.similarity_search(
+    # Vector Search und Graph Query sind unabhängig -> parallel ausführen
+    logger.debug(f"🔍 Vector search in collection: {VECTOR_COLLECTION_NAME}")
+    logger.debug("🕸️ Querying graph database")
+    vector_results, context_graph = await asyncio.gather(
+        vector_store.similarity_search(
             query=query,
             k=5,
             score_threshold=0.8,
-        )
+        ),
+        graph_store.query_graph(query),
+        return_exceptions=True,
+    )
+    
+    # Abgebrochene Teilsuchen (CancelledError ist keine Exception) weiterreichen
+    for outcome in (vector_results, context_graph):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+    
+    # Teil 1: Vector Search für Textabschnitte
+    if isinstance(vector_results, BaseException):
+        logger.error(f"❌ Vector search failed: {vector_results}", exc_info=vector_results)
+        result_parts.append("=== TEXT WISSEN ===\nVektor-Suche nicht verfügbar.\n")
+    elif vector_results:
+        result_parts.append("=== TEXT WISSEN (Relevante Dokument-Abschnitte) ===\n")
         
-        if vector_results:
-            result_parts.append("=== TEXT WISSEN (Relevante Dokument-Abschnitte) ===\n")
-            
-            for i, doc in enumerate(vector_results):
-                filename = doc.metadata.get("filename", "Unknown")
-                chunk_idx = doc.metadata.get("chunk_index", 0)
-                content = doc.page_content[:500]  # Limit content length
-                
-                result_parts.append(
-                    f"[Quelle {i+1}: {filename}, Chunk {chunk_idx}]\n{content}\n"
-                )
+        for i, doc in enumerate(vector_results, start=1):
+            filename = doc.metadata.get("filename", "Unknown")
+            chunk_idx = doc.metadata.get("chunk_index", 0)
+            content = doc.page_content
+            if len(content) > MAX_CHUNK_CHARS:  # Nur kürzen (kopieren), wenn nötig
+                content = content[:MAX_CHUNK_CHARS]
             
-            logger.info(f"✅ Vector search: {len(vector_results)} chunks found")
-        else:
-            result_parts.append("=== TEXT WISSEN ===\nKeine relevanten Textabschnitte gefunden.\n")
-            logger.info("⚠️ Vector search: No results found")
-            
-    except Exception as e:
-        logger.error(f"❌ Vector search failed: {e}", exc_info=True)
-        result_parts.append("=== TEXT WISSEN ===\nVektor-Suche nicht verfügbar.\n")
+            result_parts.append(
+                f"[Quelle {i}: {filename}, Chunk {chunk_idx}]\n{content}\n"
+            )
+        
+        logger.info(f"✅ Vector search: {len(vector_results)} chunks found")
+    else:
+        result_parts.append("=== TEXT WISSEN ===\nKeine relevanten Textabschnitte gefunden.\n")
+        logger.info("⚠️ Vector search: No results found")
     
     # Teil 2: Graph Search für Entitäten und Beziehungen
-    try:
-        logger.debug("🕸️ Querying graph database")
-        context_graph = await graph_store.query_graph(query)
-        
-        if context_graph and context_graph.strip():
-            result_parts.append("\n=== GRAPH WISSEN (Entitäten und Beziehungen) ===\n")
-            result_parts.append(context_graph)
-            
-            graph_lines = len(context_graph.strip().split('\n'))
-            logger.info(f"✅ Graph search: {graph_lines} relationships found")
-        else:
-            result_parts.append("\n=== GRAPH WISSEN ===\nKeine Graph-Daten verfügbar.\n")
-            logger.info("⚠️ Graph search: No results found")
-            
-    except Exception as e:
-        logger.error(f"❌ Graph search failed: {e}", exc_info=True)
+    if isinstance(context_graph, BaseException):
+        logger.error(f"❌ Graph search failed: {context_graph}", exc_info=context_graph)
         result_parts.append("\n=== GRAPH WISSEN ===\nGraph-Suche nicht verfügbar.\n")
+    elif context_graph and context_graph.strip():
+        result_parts.append("\n=== GRAPH WISSEN (Entitäten und Beziehungen) ===\n")
+        result_parts.append(context_graph)
+        
+        graph_lines = context_graph.strip().count('\n') + 1
+        logger.info(f"✅ Graph search: {graph_lines} relationships found")
+    else:
+        result_parts.append("\n=== GRAPH WISSEN ===\nKeine Graph-Daten verfügbar.\n")
+        logger.info("⚠️ Graph search: No results found")
     
     # Kombiniere alle Teile
     final_result = "".join(result_parts)
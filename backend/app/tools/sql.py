@@ -20,16 +20,22 @@ This ensures that even if SQL injection bypasses application-level validation,
 the attacker cannot modify data due to database-level permissions.
 """
 
-import json
+import csv
+import io
 import logging
 import re
-from typing import List, Tuple
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Literal, Optional, Tuple
 
+import orjson
 import sqlparse
 from langchain_core.tools import tool
 from sqlalchemy import inspect, text
 from sqlalchemy.engine import Engine
 
+from app.core.config import get_settings
 from app.prompts import get_prompt
 from app.services.sql_connector import get_sql_connector_service
 
@@ -39,6 +45,31 @@ logger = logging.getLogger(__name__)
 _EXECUTE_SQL_QUERY_DESCRIPTION = get_prompt("tool_execute_sql_query")
 _GET_SQL_SCHEMA_DESCRIPTION = get_prompt("tool_get_sql_schema")
 
+# Schema-Cache für get_sql_schema: (source_id, tables) -> (expires_at, engine, schema_text)
+# Schemas ändern sich selten, Reflection kostet mehrere Katalog-Roundtrips pro Tabelle.
+# Einträge gelten nur für die Engine, mit der sie erzeugt wurden: close_all() und
+# reload_sources() im SQLConnectorService schließen die Engines, danach werden
+# die Einträge nicht mehr verwendet. Nach Schema-Migrationen clear_sql_schema_cache().
+SCHEMA_CACHE_TTL_SECONDS = 300
+SCHEMA_CACHE_MAX_ENTRIES = 32
+_schema_cache: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[float, Engine, str]] = {}
+_schema_cache_lock = threading.Lock()
+
+
+def clear_sql_schema_cache(source_id: Optional[str] = None) -> None:
+    """
+    Clear cached get_sql_schema results (e.g. after a schema migration).
+
+    Args:
+        source_id: Only clear entries of this source; clears everything if None
+    """
+    with _schema_cache_lock:
+        if source_id is None:
+            _schema_cache.clear()
+            return
+        for key in [key for key in _schema_cache if key[0] == source_id]:
+            del _schema_cache[key]
+
 
 # =============================================================================
 # Security: SQL Query Validation using sqlparse
@@ -49,46 +80,108 @@ class SQLSecurityError(Exception):
     pass
 
 
-def validate_sql_query(query: str) -> Tuple[bool, str]:
+# Upper bound for query length (SQL_MAX_QUERY_LENGTH, 0 disables). sqlparse is pure
+# Python and holds the GIL, so this bounds the time a single validation can block
+# other requests.
+MAX_SQL_QUERY_LENGTH = get_settings().sql_max_query_length
+
+# Leading tokens a SELECT statement can start with (checked before parsing)
+_ALLOWED_LEADING_TOKENS = ("SELECT", "WITH", "(")
+_LEADING_WORD_RE = re.compile(r"\s*(\S+)")
+_COMMENT_MARKERS = ("--", "/*", "#")
+
+# Fast path: a query starting with SELECT that contains no ';' (other than one
+# trailing) is provably a single SELECT statement, so sqlparse can be skipped.
+# Anything else (CTEs, semicolons inside literals, stacking) goes through sqlparse.
+_SIMPLE_SELECT_RE = re.compile(r"\s*SELECT\b[^;]*;?\s*", re.IGNORECASE)
+
+# Dangerous patterns that might bypass sqlparse detection, fused into one
+# case-insensitive alternation of named groups so the query is scanned once
+# (without an uppercased copy). Compiled once at import; matching stops at the first hit.
+_ALWAYS_TRUE_PATTERNS = (
+    r"'\s*'\s*=\s*'",       # '' = ''
+    r"1\s*=\s*1",           # 1=1
+    r"'1'\s*=\s*'1'",       # '1'='1'
+    r"OR\s+1\s*=\s*1",      # OR 1=1
+    r"OR\s+'1'\s*=\s*'1'",  # OR '1'='1'
+)
+_TIME_FUNCTIONS = ("PG_SLEEP", "SLEEP", "WAITFOR", "BENCHMARK")
+
+_DANGEROUS_PATTERNS = (
+    # 4a: UNION (data exfiltration from other tables)
+    ("union", r"UNION"),
+    # 4b: information_schema access (schema enumeration)
+    ("information_schema", r"INFORMATION_SCHEMA"),
+    # 4c: SQL comments (often used to hide injection)
+    ("comment", r"--|/\*|\#"),
+    # 4d: Suspicious always-true conditions (common injection pattern)
+    # This is a heuristic - legitimate queries rarely use these patterns
+    ("always_true", "|".join(_ALWAYS_TRUE_PATTERNS)),
+    # 4e: Time-based blind injection attempts
+    ("time_function", "|".join(_TIME_FUNCTIONS)),
+)
+
+_DANGEROUS_PATTERN_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in _DANGEROUS_PATTERNS),
+    re.IGNORECASE,
+)
+
+# Static validation results, shared across calls (dynamic messages stay f-strings)
+_VALID: Tuple[bool, str] = (True, "")
+_ERR_EMPTY: Tuple[bool, str] = (False, "Query cannot be empty")
+_ERR_NO_STATEMENT = "No valid SQL statement found"
+_ERR_STATEMENT_STACKING = (
+    "Multiple SQL statements detected (statement stacking). "
+    "Only single SELECT queries are allowed."
+)
+
+# Results for the static dangerous-pattern groups (time_function is dynamic)
+_DANGEROUS_PATTERN_ERRORS: Dict[str, Tuple[bool, str]] = {
+    "union": (False, (
+        "UNION queries are not allowed. "
+        "This prevents unauthorized access to other tables."
+    )),
+    "information_schema": (False, (
+        "Access to INFORMATION_SCHEMA is not allowed. "
+        "Use the get_sql_schema tool to inspect table structures."
+    )),
+    "comment": (False, (
+        "SQL comments (-- or /* or #) are not allowed. "
+        "Please provide a clean query without comments."
+    )),
+    "always_true": (False, (
+        "Suspicious pattern detected (always-true condition). "
+        "This pattern is commonly used in SQL injection attacks."
+    )),
+}
+
+
+def _validate_statement_structure(query: str) -> str:
     """
-    Validate a SQL query for security using sqlparse.
-
-    This implements a whitelist approach:
-    1. Parse the query using sqlparse
-    2. Verify exactly ONE statement (no statement stacking)
-    3. Verify the statement type is SELECT (whitelist)
-    4. Check for suspicious patterns that indicate injection attempts
+    Parse the query with sqlparse and verify it is exactly one SELECT statement.
 
     Args:
         query: The SQL query string to validate
 
     Returns:
-        Tuple of (is_valid, error_message)
-        If is_valid is True, error_message is empty.
-        If is_valid is False, error_message explains why.
+        Error message, or an empty string if the query is a single SELECT
     """
-    if not query or not query.strip():
-        return False, "Query cannot be empty"
-
     # Step 1: Parse with sqlparse
     try:
         statements = sqlparse.parse(query)
     except Exception as e:
         logger.warning(f"SQL parsing failed: {e}")
-        return False, f"Failed to parse SQL query: {e}"
+        return f"Failed to parse SQL query: {e}"
 
     # Step 2: Verify exactly ONE statement (prevents statement stacking)
     # Filter out empty statements (sqlparse may return empty ones for trailing semicolons)
     non_empty_statements = [s for s in statements if s.get_type() != 'UNKNOWN' or str(s).strip()]
 
     if len(non_empty_statements) == 0:
-        return False, "No valid SQL statement found"
+        return _ERR_NO_STATEMENT
 
     if len(non_empty_statements) > 1:
-        return False, (
-            "Multiple SQL statements detected (statement stacking). "
-            "Only single SELECT queries are allowed."
-        )
+        return _ERR_STATEMENT_STACKING
 
     statement = non_empty_statements[0]
 
@@ -97,73 +190,137 @@ def validate_sql_query(query: str) -> Tuple[bool, str]:
 
     # sqlparse returns the type as uppercase string
     if stmt_type != 'SELECT':
-        return False, (
+        return (
             f"Statement type '{stmt_type}' is not allowed. "
             f"Only SELECT queries are permitted."
         )
 
-    # Step 4: Check for dangerous patterns that might bypass sqlparse detection
-    query_upper = query.upper()
+    return ""
 
-    # 4a: Check for UNION (data exfiltration from other tables)
-    if 'UNION' in query_upper:
-        return False, (
-            "UNION queries are not allowed. "
-            "This prevents unauthorized access to other tables."
-        )
 
-    # 4b: Check for information_schema access (schema enumeration)
-    if 'INFORMATION_SCHEMA' in query_upper:
+@lru_cache(maxsize=512)
+def validate_sql_query(query: str) -> Tuple[bool, str]:
+    """
+    Validate a SQL query for security using sqlparse.
+
+    Validation depends only on the query string, so results are cached
+    (agents often re-issue the same query). Use validate_sql_query.cache_clear()
+    to reset.
+
+    This implements a whitelist approach:
+    1. Parse the query using sqlparse
+    2. Verify exactly ONE statement (no statement stacking)
+    3. Verify the statement type is SELECT (whitelist)
+    4. Check for suspicious patterns that indicate injection attempts
+
+    Args:
+        query: The SQL query string to validate
+
+    Returns:
+        Tuple of (is_valid, error_message)
+        If is_valid is True, error_message is empty.
+        If is_valid is False, error_message explains why.
+    """
+    if not query or not query.strip():
+        return _ERR_EMPTY
+
+    if MAX_SQL_QUERY_LENGTH and len(query) > MAX_SQL_QUERY_LENGTH:
         return False, (
-            "Access to INFORMATION_SCHEMA is not allowed. "
-            "Use the get_sql_schema tool to inspect table structures."
+            f"Query is too long ({len(query)} characters). "
+            f"At most {MAX_SQL_QUERY_LENGTH} characters are allowed (SQL_MAX_QUERY_LENGTH). "
+            "Please shorten the query, e.g. select fewer columns or use shorter IN lists."
         )
 
-    # 4c: Check for SQL comments (often used to hide injection)
-    if '--' in query or '/*' in query or '#' in query:
+    # Step 0: Cheap prefilter - reject obvious non-SELECT statements before
+    # paying for sqlparse. WITH (CTE) and parenthesized SELECTs are left to Step 3.
+    # A leading comment gets the comment error (Step 4c), not a misleading statement type.
+    first_word = _LEADING_WORD_RE.match(query).group(1).upper()
+    if first_word.startswith(_COMMENT_MARKERS):
+        return _DANGEROUS_PATTERN_ERRORS["comment"]
+    if not first_word.startswith(_ALLOWED_LEADING_TOKENS):
         return False, (
-            "SQL comments (-- or /* or #) are not allowed. "
-            "Please provide a clean query without comments."
+            f"Statement type '{first_word}' is not allowed. "
+            f"Only SELECT queries are permitted."
         )
 
-    # 4d: Check for suspicious always-true conditions (common injection pattern)
-    # This is a heuristic - legitimate queries rarely use these patterns
-    always_true_patterns = [
-        r"'\s*'\s*=\s*'",       # '' = ''
-        r"1\s*=\s*1",           # 1=1
-        r"'1'\s*=\s*'1'",       # '1'='1'
-        r"OR\s+1\s*=\s*1",      # OR 1=1
-        r"OR\s+'1'\s*=\s*'1'",  # OR '1'='1'
-    ]
-
-    for pattern in always_true_patterns:
-        if re.search(pattern, query_upper):
-            return False, (
-                "Suspicious pattern detected (always-true condition). "
-                "This pattern is commonly used in SQL injection attacks."
-            )
+    # Steps 1-3 via sqlparse, unless the fast path already proves a single SELECT
+    if not _SIMPLE_SELECT_RE.fullmatch(query):
+        error_message = _validate_statement_structure(query)
+        if error_message:
+            return False, error_message
 
-    # 4e: Check for time-based blind injection attempts
-    time_functions = ['SLEEP', 'WAITFOR', 'BENCHMARK', 'PG_SLEEP']
-    for func in time_functions:
-        if func in query_upper:
+    # Step 4: Check for dangerous patterns that might bypass sqlparse detection
+    # 4a-4e: Single scan for UNION, INFORMATION_SCHEMA, comments,
+    # always-true conditions and time-based functions (see _DANGEROUS_PATTERNS)
+    match = _DANGEROUS_PATTERN_RE.search(query)
+    if match is not None:
+        if match.lastgroup == "time_function":
             return False, (
-                f"Time-based function '{func}' is not allowed. "
+                f"Time-based function '{match.group().upper()}' is not allowed. "
                 "This pattern is commonly used in blind SQL injection."
             )
+        return _DANGEROUS_PATTERN_ERRORS[match.lastgroup]
 
     # 4f: Check for subqueries that could access other tables
     # This is optional - you might want to allow subqueries in some cases
     # Uncomment if you want strict single-table access:
-    # if re.search(r'\(\s*SELECT', query_upper):
+    # if re.search(r'\(\s*SELECT', query, re.IGNORECASE):
     #     return False, "Subqueries are not allowed for security reasons."
 
     logger.debug(f"SQL query passed security validation: {query[:50]}...")
-    return True, ""
+    return _VALID
+
+
+def _rows_to_csv(rows: List) -> str:
+    """
+    Format result rows as CSV with a short format note for the LLM.
+
+    Args:
+        rows: Non-empty list of SQLAlchemy RowMapping objects
+
+    Returns:
+        CSV text: format note, header line with column names, one line per row
+    """
+    buffer = io.StringIO()
+    buffer.write("Format: CSV (erste Zeile = Spaltennamen)\n")
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(rows[0].keys())
+    writer.writerows(row.values() for row in rows)
+    return buffer.getvalue().rstrip("\n")
+
+
+# Dialects that understand a trailing LIMIT clause
+_LIMIT_DIALECTS = frozenset({"postgresql", "mysql", "mariadb", "sqlite"})
+
+# Any row-limiting/locking clause means the query is left untouched (conservative:
+# also matches nested LIMITs or the word inside literals, which only skips the rewrite)
+_ROW_LIMIT_CLAUSE_RE = re.compile(r"\b(?:LIMIT|FETCH|OFFSET|FOR)\b", re.IGNORECASE)
+
+
+def _apply_row_limit(query: str, limit: int, dialect_name: str) -> str:
+    """
+    Append a LIMIT clause so large result sets are cut off in the database.
+
+    Args:
+        query: Validated single SELECT query
+        limit: Maximum number of rows to fetch
+        dialect_name: SQLAlchemy dialect name of the target engine
+
+    Returns:
+        The query with " LIMIT <limit>" appended, or unchanged if the dialect
+        doesn't support LIMIT or the query already limits its rows
+    """
+    if dialect_name not in _LIMIT_DIALECTS or _ROW_LIMIT_CLAUSE_RE.search(query):
+        return query
+    return f"{query.rstrip().rstrip(';').rstrip()} LIMIT {int(limit)}"
 
 
 @tool
-def execute_sql_query(query: str, source_id: str = "erp_postgres") -> str:
+def execute_sql_query(
+    query: str,
+    source_id: str = "erp_postgres",
+    result_format: Literal["csv", "json"] = "csv",
+) -> str:
     """Führt eine SQL SELECT Query auf einer externen Datenbank aus (z.B. IoT, ERP).
 
     Nur SELECT Queries sind erlaubt (keine INSERT, UPDATE, DELETE).
@@ -172,9 +329,10 @@ def execute_sql_query(query: str, source_id: str = "erp_postgres") -> str:
     Args:
         query: Die SQL SELECT Query
         source_id: Die ID der Datenquelle (z.B. "iot_database", "erp_postgres")
+        result_format: "csv" (Standard, spart Tokens) oder "json" (Liste von Objekten)
 
     Returns:
-        Query-Ergebnisse als JSON
+        Query-Ergebnisse als CSV (erste Zeile = Spaltennamen) oder JSON
     """
     logger.info(f"🔧 SQL Tool: Executing query on source '{source_id}'")
     logger.debug(f"Query: {query[:200]}...")
@@ -191,31 +349,40 @@ def execute_sql_query(query: str, source_id: str = "erp_postgres") -> str:
         connector = get_sql_connector_service()
         engine = connector.get_engine(source_id)
         
-        # Führe Query aus
+        # Begrenze die Anzahl der Zeilen für die Rückgabe
+        max_rows = 100
+        
+        # max_rows + 1 bereits in der DB begrenzen (die zusätzliche Zeile zeigt Kürzung an)
+        limited_query = _apply_row_limit(query, max_rows + 1, engine.dialect.name)
+        
+        # Führe Query aus (Server-Side Cursor: Zeilen werden gestreamt statt komplett geladen)
         with engine.connect() as connection:
-            result = connection.execute(text(query))
+            result = connection.execute(
+                text(limited_query),
+                execution_options={"stream_results": True, "yield_per": max_rows},
+            )
             
-            # Konvertiere Ergebnisse zu Liste von Dicts
-            rows = []
-            for row in result:
-                row_dict = dict(row._mapping)
-                rows.append(row_dict)
+            # Hole Ergebnisse als RowMappings - nur max_rows + 1 Zeilen
+            # lesen, die zusätzliche Zeile zeigt an, dass es weitere gibt
+            rows = result.mappings().fetchmany(max_rows + 1)
+            result.close()
             
-            # Begrenze die Anzahl der Zeilen für die Rückgabe
-            max_rows = 100
             if len(rows) > max_rows:
-                logger.warning(f"⚠️ Query returned {len(rows)} rows, limiting to {max_rows}")
-                rows = rows[:max_rows]
+                logger.warning(f"⚠️ Query returned more than {max_rows} rows, limiting to {max_rows}")
+                del rows[max_rows:]
                 truncated_msg = f"\n\n(Hinweis: Ergebnisse auf {max_rows} Zeilen begrenzt)"
             else:
                 truncated_msg = ""
             
-            # Formatiere als JSON
+            # Formatiere als CSV (Spaltennamen nur einmal) oder kompaktes JSON
+            # (orjson serialisiert datetime/UUID nativ, alles andere wie Decimal über str)
             if not rows:
                 result_str = "Query erfolgreich ausgeführt, aber keine Zeilen gefunden."
-            else:
-                result_str = json.dumps(rows, indent=2, default=str, ensure_ascii=False)
+            elif result_format == "json":
+                result_str = orjson.dumps([dict(row) for row in rows], default=str).decode()
                 result_str += truncated_msg
+            else:
+                result_str = _rows_to_csv(rows) + truncated_msg
             
             logger.info(f"✅ Query executed successfully: {len(rows)} rows returned")
             return result_str
@@ -261,11 +428,20 @@ def get_sql_schema(source_id: str = "erp_postgres", table_names: List[str] = Non
     if table_names:
         logger.debug(f"Tables requested: {table_names}")
     
+    cache_key = (source_id, tuple(sorted(table_names)) if table_names else None)
+    
     try:
         # Hole SQL Connector Service
         connector = get_sql_connector_service()
         engine = connector.get_engine(source_id)
         
+        # Cache-Hit (gleiche Engine, nicht abgelaufen): keine erneute Reflection
+        with _schema_cache_lock:
+            cached = _schema_cache.get(cache_key)
+        if cached is not None and cached[0] > time.monotonic() and cached[1] is engine:
+            logger.info(f"✅ Schema served from cache for source '{source_id}'")
+            return cached[2]
+        
         # Verwende SQLAlchemy Inspector
         inspector = inspect(engine)
         
@@ -287,39 +463,52 @@ def get_sql_schema(source_id: str = "erp_postgres", table_names: List[str] = Non
         # Sammle Schema-Informationen
         schema_parts = [f"=== SQL Schema für Source: {source_id} ===\n"]
         
+        # Spalten, Primary Keys und Foreign Keys aller Tabellen mit je einer
+        # Katalog-Abfrage holen (statt 3 Abfragen pro Tabelle).
+        # Keys sind (schema, table_name), schema ist None für das Default-Schema.
+        all_columns = inspector.get_multi_columns(filter_names=tables_to_inspect)
+        all_pks = inspector.get_multi_pk_constraint(filter_names=tables_to_inspect)
+        all_fks = inspector.get_multi_foreign_keys(filter_names=tables_to_inspect)
+        
         for table_name in tables_to_inspect:
-            schema_parts.append(f"\n--- Tabelle: {table_name} ---")
-            
-            # Hole Spalten
-            columns = inspector.get_columns(table_name)
-            schema_parts.append("Spalten:")
+            # Ein String pro Tabelle, am Ende ein einziger Join über alle Blöcke
+            table_lines = [f"\n--- Tabelle: {table_name} ---", "Spalten:"]
             
-            for col in columns:
-                col_name = col['name']
+            # Spalten
+            for col in all_columns.get((None, table_name), []):
                 col_type = str(col['type'])
                 nullable = "NULL" if col.get('nullable', True) else "NOT NULL"
-                default = f", Default: {col.get('default')}" if col.get('default') else ""
-                
-                schema_parts.append(f"  - {col_name}: {col_type} {nullable}{default}")
+                default = f", Default: {col['default']}" if col.get('default') else ""
+                table_lines.append(f"  - {col['name']}: {col_type} {nullable}{default}")
             
-            # Hole Primary Keys
-            pk = inspector.get_pk_constraint(table_name)
+            # Primary Keys
+            pk = all_pks.get((None, table_name))
             if pk and pk.get('constrained_columns'):
-                pk_cols = ", ".join(pk['constrained_columns'])
-                schema_parts.append(f"Primary Key: {pk_cols}")
+                table_lines.append(f"Primary Key: {', '.join(pk['constrained_columns'])}")
             
-            # Hole Foreign Keys
-            fks = inspector.get_foreign_keys(table_name)
+            # Foreign Keys
+            fks = all_fks.get((None, table_name), [])
             if fks:
-                schema_parts.append("Foreign Keys:")
-                for fk in fks:
-                    fk_cols = ", ".join(fk['constrained_columns'])
-                    ref_table = fk['referred_table']
-                    ref_cols = ", ".join(fk['referred_columns'])
-                    schema_parts.append(f"  - {fk_cols} -> {ref_table}({ref_cols})")
+                table_lines.append("Foreign Keys:")
+                table_lines.extend(
+                    f"  - {', '.join(fk['constrained_columns'])} -> "
+                    f"{fk['referred_table']}({', '.join(fk['referred_columns'])})"
+                    for fk in fks
+                )
+            
+            schema_parts.append("\n".join(table_lines))
         
         result_str = "\n".join(schema_parts)
         
+        with _schema_cache_lock:
+            _schema_cache.pop(cache_key, None)
+            if len(_schema_cache) >= SCHEMA_CACHE_MAX_ENTRIES:
+                # Ältesten Eintrag verwerfen (dict behält Einfügereihenfolge)
+                _schema_cache.pop(next(iter(_schema_cache)))
+            _schema_cache[cache_key] = (
+                time.monotonic() + SCHEMA_CACHE_TTL_SECONDS, engine, result_str
+            )
+        
         logger.info(f"✅ Schema retrieved for {len(tables_to_inspect)} table(s)")
         return result_str
     
@@ -3,14 +3,97 @@ Fuzzy Matching Utilities for Entity Resolution.
 
 Provides Levenshtein Distance and fuzzy string matching
 to handle typos and variations in entity names.
+
+Distances are computed by RapidFuzz (bit-parallel C++ implementation) when
+installed, otherwise by a pure-Python bit-parallel fallback.
 """
 
 import logging
-from typing import List, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import TYPE_CHECKING, List, Tuple
+
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # Optional C extension - fall back to pure Python
+    process = None
+    Levenshtein = None
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+def _strip_common_affixes(s1: str, s2: str) -> Tuple[str, str]:
+    """
+    Remove the common prefix and suffix of two strings.
+
+    The edit distance is unchanged, but entity names often share long parts
+    ("Lumix Solutions GmbH" vs "Lumix Solutons GmbH"), which shrinks the DP.
+    """
+    limit = min(len(s1), len(s2))
+    start = 0
+    while start < limit and s1[start] == s2[start]:
+        start += 1
+
+    end = 0
+    while end < limit - start and s1[-1 - end] == s2[-1 - end]:
+        end += 1
+
+    return s1[start:len(s1) - end], s2[start:len(s2) - end]
+
+
+def _bit_parallel_distance(s1: str, s2: str) -> int:
+    """
+    Levenshtein distance via the Myers/Hyyrö bit-parallel algorithm.
+
+    Each DP column is encoded as bit vectors in a Python int (one bit per
+    character of the longer string), so one loop iteration advances a whole
+    column instead of filling an O(n*m) matrix.
+
+    Args:
+        s1: First string (already normalized)
+        s2: Second string (already normalized)
+
+    Returns:
+        Levenshtein distance
+    """
+    s1, s2 = _strip_common_affixes(s1, s2)
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    m = len(s1)
+    if m == 0:
+        return len(s2)
+
+    # Bitmask of positions in s1 per character
+    peq: dict[str, int] = {}
+    for i, ch in enumerate(s1):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    vp, vn, score = mask, 0, m
+
+    for ch in s2:
+        eq = peq.get(ch, 0)
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        hp = vn | (~(xh | vp) & mask)
+        hn = vp & xh
+        if hp & last:
+            score += 1
+        elif hn & last:
+            score -= 1
+        hp = ((hp << 1) | 1) & mask
+        hn = (hn << 1) & mask
+        vp = hn | (~(xv | hp) & mask)
+        vn = hp & xv
+
+    return score
+
+
 def levenshtein_distance(s1: str, s2: str) -> int:
     """
     Calculate Levenshtein Distance between two strings.
@@ -32,46 +115,63 @@ def levenshtein_distance(s1: str, s2: str) -> int:
         >>> levenshtein_distance("Lumix Solutions", "Lumix Solutons")
         1
     """
-    # Convert to lowercase for case-insensitive comparison
-    s1 = s1.lower()
-    s2 = s2.lower()
-    
-    # Quick checks
-    if s1 == s2:
-        return 0
-    if len(s1) == 0:
-        return len(s2)
-    if len(s2) == 0:
-        return len(s1)
-    
-    # Create matrix
-    rows = len(s1) + 1
-    cols = len(s2) + 1
-    
-    # Initialize matrix
-    dist = [[0 for _ in range(cols)] for _ in range(rows)]
-    
-    # Fill first column and row
-    for i in range(1, rows):
-        dist[i][0] = i
-    for j in range(1, cols):
-        dist[0][j] = j
-    
-    # Calculate distances
-    for i in range(1, rows):
-        for j in range(1, cols):
-            if s1[i-1] == s2[j-1]:
-                cost = 0
-            else:
-                cost = 1
-            
-            dist[i][j] = min(
-                dist[i-1][j] + 1,      # deletion
-                dist[i][j-1] + 1,      # insertion
-                dist[i-1][j-1] + cost  # substitution
-            )
-    
-    return dist[-1][-1]
+    # Case-insensitive comparison
+    return _levenshtein_raw(s1.lower(), s2.lower())
+
+
+def _levenshtein_raw(s1: str, s2: str) -> int:
+    """Levenshtein distance without normalization (callers lowercase once)."""
+    if Levenshtein is not None:
+        return Levenshtein.distance(s1, s2)
+    return _bit_parallel_distance(s1, s2)
+
+
+def bounded_levenshtein(s1: str, s2: str, max_k: int) -> int:
+    """
+    Levenshtein distance with an upper bound (case-sensitive).
+
+    Only the diagonal band of width 2*max_k+1 is computed (Ukkonen), and the
+    computation stops as soon as every cell of a row exceeds max_k.
+
+    Args:
+        s1: First string
+        s2: Second string
+        max_k: Largest distance of interest
+
+    Returns:
+        The distance if it is <= max_k, otherwise max_k + 1
+    """
+    if Levenshtein is not None:
+        return Levenshtein.distance(s1, s2, score_cutoff=max_k)
+
+    cap = max_k + 1
+    if abs(len(s1) - len(s2)) > max_k:
+        return cap
+
+    s1, s2 = _strip_common_affixes(s1, s2)
+
+    # Two rolling rows, swapped per row. Only the band cells plus their two
+    # neighbours (read by the next row) are written.
+    n = len(s2)
+    prev = [min(j, cap) for j in range(n + 1)]
+    cur = [cap] * (n + 1)
+    for i in range(1, len(s1) + 1):
+        lo = max(1, i - max_k)
+        hi = min(n, i + max_k)
+        cur[0] = min(i, cap)
+        if lo > 1:
+            cur[lo - 1] = cap
+        if hi < n:
+            cur[hi + 1] = cap
+        ch = s1[i - 1]
+        for j in range(lo, hi + 1):
+            cost = 0 if ch == s2[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost, cap)
+        if min(cur[lo - 1:hi + 1]) >= cap:
+            return cap
+        prev, cur = cur, prev
+
+    return prev[n]
 
 
 def fuzzy_similarity(s1: str, s2: str) -> float:
@@ -94,14 +194,93 @@ def fuzzy_similarity(s1: str, s2: str) -> float:
         >>> fuzzy_similarity("Lumix Solutions", "Lumix Solutons")
         0.933  # 14/15 characters match
     """
+    return fuzzy_similarity_prelowered(s1.lower(), s2.lower())
+
+
+def fuzzy_similarity_prelowered(s1: str, s2: str) -> float:
+    """
+    fuzzy_similarity for strings that are already lowercased.
+
+    Lets loops lowercase the search term once instead of per candidate.
+    """
+    if Levenshtein is not None:
+        return Levenshtein.normalized_similarity(s1, s2)
+
+    # Canonical key: shorter string first, so (a, b) and (b, a) share a cache entry
+    if len(s1) > len(s2):
+        s1, s2 = s2, s1
+    return _normalized_similarity(s1, s2)
+
+
+@lru_cache(maxsize=4096)
+def _normalized_similarity(s1: str, s2: str) -> float:
+    """
+    Pure-Python 1 - distance / max(len) for already lowercased strings (1.0 for two empty strings).
+
+    Cached because the same (search term, entity name) pairs recur across requests.
+    The RapidFuzz call is cheaper than the cache bookkeeping, so it is not cached.
+    """
     max_len = max(len(s1), len(s2))
     if max_len == 0:
         return 1.0
-    
-    distance = levenshtein_distance(s1, s2)
-    similarity = 1.0 - (distance / max_len)
-    
-    return similarity
+    return 1.0 - (_bit_parallel_distance(s1, s2) / max_len)
+
+
+def _similarity_from_distance(distance: int, len1: int, len2: int) -> float:
+    """1 - distance / max(len), same formula as Levenshtein.normalized_similarity."""
+    max_len = max(len1, len2)
+    if max_len == 0:
+        return 1.0
+    return 1.0 - distance / max_len
+
+
+def fuzzy_similarity_matrix(queries: List[str], candidates: List[str]) -> "np.ndarray":
+    """
+    Calculate fuzzy similarities for all query/candidate pairs at once.
+
+    Same score as fuzzy_similarity. With RapidFuzz the whole matrix is computed
+    in one C++ call; otherwise, when queries and candidates are the same list,
+    only the upper triangle is computed and mirrored.
+
+    Requires NumPy, which is imported here so the rest of the module doesn't need it.
+
+    Args:
+        queries: Strings to match (rows)
+        candidates: Strings to match against (columns)
+
+    Returns:
+        float32 array of shape (len(queries), len(candidates)) with scores 0.0 to 1.0
+
+    Example:
+        >>> fuzzy_similarity_matrix(["Lumix Solutons"], ["Lumix Solutions", "ACME"]).round(2)
+        array([[0.93, 0.07]], dtype=float32)
+    """
+    import numpy as np
+
+    if process is not None:
+        return process.cdist(
+            queries,
+            candidates,
+            scorer=Levenshtein.normalized_similarity,
+            processor=str.lower,
+            dtype=np.float32,
+        )
+
+    matrix = np.empty((len(queries), len(candidates)), dtype=np.float32)
+    candidates_lower = [candidate.lower() for candidate in candidates]
+    if queries is candidates:
+        # Symmetric: compute j > i only and mirror, the diagonal is identical strings
+        for i, query in enumerate(candidates_lower):
+            matrix[i, i] = 1.0
+            for j in range(i + 1, len(candidates_lower)):
+                matrix[i, j] = matrix[j, i] = fuzzy_similarity_prelowered(query, candidates_lower[j])
+        return matrix
+
+    for i, query in enumerate(queries):
+        query = query.lower()
+        for j, candidate in enumerate(candidates_lower):
+            matrix[i, j] = fuzzy_similarity_prelowered(query, candidate)
+    return matrix
 
 
 def fuzzy_match_entities(
@@ -128,37 +307,78 @@ def fuzzy_match_entities(
         >>> fuzzy_match_entities("Lumix Solutons", candidates, threshold=0.7)
         [("zoho_123", "Lumix Solutions GmbH", "Account", 93)]
     """
+    # Length prefilter: distance >= |len(a) - len(b)|, so similarity is at most
+    # min(len) / max(len). Names outside [L * threshold, L / threshold] can't match.
+    if threshold > 0:
+        search_len = len(search_term)
+        min_len = search_len * threshold - 1e-9
+        max_len = search_len / threshold + 1e-9
+        candidates = [c for c in candidates if min_len <= len(c[1]) <= max_len]
+    
     if not candidates:
         return []
     
-    # Calculate fuzzy similarity for each candidate
+    # Calculate fuzzy similarity for each candidate (in input order), keeping
+    # only those above the threshold.
+    if process is not None:
+        # Bounded distance: RapidFuzz aborts a candidate once its distance must
+        # exceed the largest one any candidate could still match with (+1 against
+        # float rounding). The exact threshold is checked here; RapidFuzz's own
+        # normalized score_cutoff can drop exact-threshold matches.
+        search_lower = search_term.lower()
+        names_lower = [candidate[1].lower() for candidate in candidates]
+        max_distance = None
+        if threshold > 0:
+            longest = max(len(search_lower), max(map(len, names_lower)))
+            max_distance = int((1 - threshold) * longest) + 1
+        matches = (
+            (candidates[index], similarity)
+            for _, distance, index in process.extract_iter(
+                search_lower,
+                names_lower,
+                scorer=Levenshtein.distance,
+                score_cutoff=max_distance,
+            )
+            if (similarity := _similarity_from_distance(
+                distance, len(search_lower), len(names_lower[index])
+            )) >= threshold
+        )
+    else:
+        search_lower = search_term.lower()
+        matches = (
+            (candidate, similarity)
+            for candidate in candidates
+            if (similarity := fuzzy_similarity_prelowered(search_lower, candidate[1].lower())) >= threshold
+        )
+    
     scored_candidates = []
+    # Similarity of the top candidate, for the debug log. Strict ">" keeps the
+    # first of equal scores, matching the stable sort below.
+    best_score, best_similarity = None, 0.0
     
-    for source_id, name, entity_type, original_score in candidates:
-        similarity = fuzzy_similarity(search_term, name)
-        
+    for (source_id, name, entity_type, original_score), similarity in matches:
         # Calculate new score
-        # Original score (exact/contains match) + fuzzy bonus
-        if similarity >= threshold:
-            # Fuzzy similarity bonus (0-30 points)
-            fuzzy_bonus = int(similarity * 30)
-            new_score = original_score + fuzzy_bonus
-            
-            scored_candidates.append((source_id, name, entity_type, new_score, similarity))
+        # Original score (exact/contains match) + fuzzy bonus (0-30 points)
+        fuzzy_bonus = int(similarity * 30)
+        new_score = original_score + fuzzy_bonus
+        
+        scored_candidates.append((source_id, name, entity_type, new_score))
+        if best_score is None or new_score > best_score:
+            best_score, best_similarity = new_score, similarity
     
     # Sort by new score (descending)
-    scored_candidates.sort(key=lambda x: x[3], reverse=True)
+    scored_candidates.sort(key=itemgetter(3), reverse=True)
     
     # Log fuzzy matching results
     if scored_candidates:
         best = scored_candidates[0]
         logger.debug(
             f"Fuzzy matching '{search_term}' → '{best[1]}' "
-            f"(similarity: {best[4]:.2f}, score: {best[3]})"
+            f"(similarity: {best_similarity:.2f}, score: {best[3]})"
         )
     
-    # Return without similarity (same format as input)
-    return [(sid, name, etype, score) for sid, name, etype, score, _ in scored_candidates]
+    # Already in the input format (source_id, name, type, score)
+    return scored_candidates
 
 
 def is_likely_typo(search_term: str, candidate: str) -> bool:
@@ -186,10 +406,7 @@ def is_likely_typo(search_term: str, candidate: str) -> bool:
     if len_diff > 3:
         return False
     
-    distance = levenshtein_distance(search_term, candidate)
-    if distance <= 3:
-        return True
-    
-    return False
+    # Bounded: stops early once the distance must exceed 3
+    return bounded_levenshtein(search_term.lower(), candidate.lower(), 3) <= 3
 
 
@@ -0,0 +1,28 @@
+"""
+Text Helpers for Logging.
+
+Small string utilities shared by services and tools.
+"""
+
+
+def shorten(text: str, limit: int = 80) -> str:
+    """
+    Shorten a string for log output.
+
+    Returns the string unchanged when it fits, so short queries are
+    logged without copying.
+
+    Args:
+        text: String to shorten
+        limit: Maximum number of characters to keep
+
+    Returns:
+        The original string, or its first ``limit`` characters followed by "…"
+
+    Examples:
+        >>> shorten("Wer ist der Ansprechpartner?", 10)
+        'Wer ist de…'
+    """
+    if len(text) <= limit:
+        return text
+    return text[:limit] + "…"
@@ -0,0 +1,11 @@
+"""
+Shared pytest configuration.
+"""
+
+
+def pytest_configure(config):
+    """Register custom markers."""
+    config.addinivalue_line(
+        "markers", "unit: fully mocked tests without shared state (safe for pytest -n auto)"
+    )
+    config.addinivalue_line("markers", "slow: long-running tests")
@@ -19,6 +19,16 @@ import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
 from io import BytesIO
 
+from app.api.endpoints.chat import _extract_contexts
+from app.api.endpoints.ingestion import sanitize_filename, validate_file_extension
+from app.services.crm_sync.property_sanitizer import PropertySanitizer
+from app.services.graph_store import GraphStoreService
+
+
+# Upload content and its hash for the concurrent deduplication test
+_DEDUP_CONTENT = b"Content uploaded by two clients at once"
+_DEDUP_HASH = hashlib.sha256(_DEDUP_CONTENT).hexdigest()
+
 
 # =============================================================================
 # TEST CATEGORY 1: UPLOAD RULES
@@ -42,8 +52,6 @@ class TestUploadExtensionBlacklist:
 
         EXPECTED: validate_file_extension returns False for dangerous extensions.
         """
-        from app.api.endpoints.ingestion import validate_file_extension
-
         dangerous_files = [
             ("malware.exe", "exe"),
             ("script.sh", "sh"),
@@ -76,8 +84,6 @@ class TestUploadExtensionBlacklist:
 
         EXPECTED: File is accepted.
         """
-        from app.api.endpoints.ingestion import sanitize_filename
-
         allowed_files = [
             ("document.pdf", "pdf"),
             ("report.docx", "docx"),
@@ -336,8 +342,6 @@ class TestPrototypePollution:
 
         EXPECTED: __proto__ key ignored or removed.
         """
-        from app.services.crm_sync.property_sanitizer import PropertySanitizer
-
         sanitizer = PropertySanitizer()
 
         malicious_props = {
@@ -379,8 +383,6 @@ class TestPrototypePollution:
 
         EXPECTED: Recursively check for dangerous keys.
         """
-        from app.services.crm_sync.property_sanitizer import PropertySanitizer
-
         sanitizer = PropertySanitizer()
 
         nested_malicious = {
@@ -409,6 +411,7 @@ class TestPrototypePollution:
 # TEST CATEGORY 3: WORKFLOW RESILIENCE
 # =============================================================================
 
+@pytest.mark.unit
 class TestWorkflowPartialSuccess:
     """
     Tests for graceful degradation when some services fail.
@@ -416,113 +419,90 @@ class TestWorkflowPartialSuccess:
     Goal: Chat should return partial results, not crash entirely.
     """
 
-    @pytest.mark.asyncio
-    async def test_graph_fails_vector_succeeds_returns_vector_results(self):
-        """
-        SCENARIO: Graph database is down, but vector store works.
+    @pytest.mark.parametrize(
+        "vector_data,graph_data,vector_empty,graph_empty",
+        [
+            ("Found relevant documents about the topic.", "", False, True),
+            ("", "Found entity: ACME Corp, related to Project Alpha", True, False),
+            ("", "", True, True),
+        ],
+        ids=["graph_fails_vector_succeeds", "vector_fails_graph_succeeds", "both_sources_fail"],
+    )
+    def test_partial_failure_returns_available_results(
+        self, vector_data, graph_data, vector_empty, graph_empty
+    ):
+        """
+        SCENARIO: Graph database and/or vector store are down.
 
         WHY THIS MATTERS:
         - Services may have different availability
         - User should still get some answer, not error
+        - Complete failure should still be graceful (empty contexts, no crash)
 
-        EXPECTED: Return answer based on vector results only.
+        EXPECTED: Each context holds its data if the service worked, else is empty.
         """
-        # Simulate partial failure: Vector works, Graph is empty
-        vector_data = "Found relevant documents about the topic."
-        graph_data = ""  # Graph failed - no data
+        # Simulate the knowledge tool output format (descriptive headers only for found data)
+        text_header = "=== TEXT WISSEN (Relevante Dokument-Abschnitte) ===" if vector_data else "=== TEXT WISSEN ==="
+        graph_header = "=== GRAPH WISSEN (Entitäten und Beziehungen) ===" if graph_data else "=== GRAPH WISSEN ==="
+        knowledge_result = f"{text_header}\n{vector_data}\n\n{graph_header}\n{graph_data}"
 
-        # Simulate the knowledge tool output format
-        knowledge_result = f"=== TEXT WISSEN ===\n{vector_data}\n=== GRAPH WISSEN ===\n{graph_data}"
+        vector_context, graph_context = _extract_contexts({"knowledge_result": knowledge_result})
 
-        # Helper to extract section content
-        def extract_section(text: str, marker: str) -> str:
-            """Extract content between marker and next === or end."""
-            if marker not in text:
-                return ""
-            start = text.find(marker) + len(marker)
-            # Skip the trailing === of the marker
-            if text[start:start+4] == " ===":
-                start += 4
-            # Find next section marker or end
-            end = text.find("===", start)
-            if end == -1:
-                end = len(text)
-            return text[start:end].strip()
+        if vector_empty:
+            assert vector_context == "", "Vector should be empty (service failed)"
+        else:
+            assert vector_context == vector_data, "Vector context should be extracted"
 
-        vector_context = extract_section(knowledge_result, "TEXT WISSEN")
-        graph_context = extract_section(knowledge_result, "GRAPH WISSEN")
+        if graph_empty:
+            assert graph_context == "", "Graph should be empty (service failed)"
+        else:
+            assert graph_context == graph_data, "Graph context should be extracted"
 
-        # Vector should have content
-        assert vector_context, "Vector context should be extracted"
-        assert "Found relevant" in vector_context
-
-        # Graph is empty - this is OK, partial success
-        assert graph_context == "", "Graph should be empty (service failed)"
-
-    @pytest.mark.asyncio
-    async def test_both_sources_fail_returns_graceful_message(self):
+    def test_chat_extracts_section_content_not_headers(self):
         """
-        SCENARIO: Both graph and vector stores are down.
+        SCENARIO: Knowledge tool returns sections with descriptive headers.
 
         WHY THIS MATTERS:
-        - Complete failure should still be graceful
-        - User should get helpful message, not stack trace
+        - Headers look like "=== TEXT WISSEN (Relevante Dokument-Abschnitte) ==="
+        - The chat response must carry the section content, not the header text
 
-        EXPECTED: Message like "Knowledge base unavailable, try again later."
+        EXPECTED: Both contexts contain only their section's content.
         """
-        # Empty knowledge result
-        knowledge_result = ""
+        knowledge_result = (
+            "=== TEXT WISSEN (Relevante Dokument-Abschnitte) ===\n"
+            "[Quelle 1: vertrag.pdf, Chunk 0]\nLaufzeit 24 Monate\n"
+            "\n=== GRAPH WISSEN (Entitäten und Beziehungen) ===\n"
+            "ACME Corp -[HAS_OWNER]-> Max Mustermann"
+        )
 
-        # Both contexts should be empty
-        vector_context = ""
-        graph_context = ""
+        vector_context, graph_context = _extract_contexts({"knowledge_result": knowledge_result})
 
-        if not vector_context and not graph_context:
-            # This is the fallback case
-            fallback_message = "Keine Wissensbasis-Daten verfügbar."
-            assert fallback_message  # Should have a fallback
+        assert vector_context == "[Quelle 1: vertrag.pdf, Chunk 0]\nLaufzeit 24 Monate"
+        assert graph_context == "ACME Corp -[HAS_OWNER]-> Max Mustermann"
 
-    @pytest.mark.asyncio
-    async def test_vector_fails_graph_succeeds_returns_graph_results(self):
+    def test_chat_extracts_sections_when_chunk_contains_equals_signs(self):
         """
-        SCENARIO: Vector store is down, but graph works.
+        SCENARIO: A document chunk itself contains "===".
 
         WHY THIS MATTERS:
-        - Inverse of the first test
-        - Graph data alone can be useful
+        - Markdown setext underlines ("Installation\\n============") and code
+          like "x === y" appear in real documents
+        - Only the tool's section headers may delimit the sections
 
-        EXPECTED: Return answer based on graph results only.
+        EXPECTED: The chunk stays intact and the graph section is still found.
         """
-        # Simulate partial failure: Graph works, Vector is empty
-        vector_data = ""  # Vector failed
-        graph_data = "Found entity: ACME Corp, related to Project Alpha"
-
-        knowledge_result = f"=== TEXT WISSEN ===\n{vector_data}\n=== GRAPH WISSEN ===\n{graph_data}"
-
-        # Helper to extract section content
-        def extract_section(text: str, marker: str) -> str:
-            """Extract content between marker and next === or end."""
-            if marker not in text:
-                return ""
-            start = text.find(marker) + len(marker)
-            # Skip the trailing === of the marker
-            if text[start:start+4] == " ===":
-                start += 4
-            # Find next section marker or end
-            end = text.find("===", start)
-            if end == -1:
-                end = len(text)
-            return text[start:end].strip()
+        chunk = "Installation\n============\nif (x === y) { run(); }"
+        knowledge_result = (
+            "=== TEXT WISSEN (Relevante Dokument-Abschnitte) ===\n"
+            f"[Quelle 1: readme.md, Chunk 0]\n{chunk}\n"
+            "\n=== GRAPH WISSEN (Entitäten und Beziehungen) ===\n"
+            "ACME -[HAS_OWNER]-> Max"
+        )
 
-        vector_context = extract_section(knowledge_result, "TEXT WISSEN")
-        graph_context = extract_section(knowledge_result, "GRAPH WISSEN")
+        vector_context, graph_context = _extract_contexts({"knowledge_result": knowledge_result})
 
-        # Vector should be empty (service failed)
-        assert vector_context == "", "Vector should be empty (service failed)"
-
-        # Graph should have content
-        assert graph_context, "Graph context should be extracted"
-        assert "ACME Corp" in graph_context
+        assert vector_context == f"[Quelle 1: readme.md, Chunk 0]\n{chunk}"
+        assert graph_context == "ACME -[HAS_OWNER]-> Max"
 
 
 class TestServiceTimeouts:
@@ -532,8 +512,7 @@ class TestServiceTimeouts:
     Goal: Slow services should timeout, not block forever.
     """
 
-    @pytest.mark.asyncio
-    async def test_slow_graph_query_has_timeout(self):
+    def test_slow_graph_query_has_timeout(self):
         """
         SCENARIO: Graph query takes > 30 seconds.
 
@@ -544,17 +523,14 @@ class TestServiceTimeouts:
         EXPECTED: Query times out after configured threshold.
         """
         # Check that Neo4j driver is configured with timeouts
-        from app.services.graph_store import GraphStoreService
-
-        # The service should have timeout configuration
-        # Default connection_acquisition_timeout is 120s in the code
-        expected_timeout_seconds = 120
+        with patch("app.services.graph_store.GraphDatabase.driver") as mock_driver:
+            GraphStoreService()
 
-        # This is a structural test - verify config exists
-        assert expected_timeout_seconds > 0
+        # connection_acquisition_timeout is 120s in the code
+        assert mock_driver.call_args.kwargs["connection_acquisition_timeout"] == 120
 
-    @pytest.mark.asyncio
-    async def test_slow_vector_search_has_timeout(self):
+    @pytest.mark.skip(reason="structural documentation - no runtime assertion")
+    def test_slow_vector_search_has_timeout(self):
         """
         SCENARIO: Vector similarity search takes too long.
 
@@ -586,14 +562,10 @@ class TestConcurrentRequests:
 
         EXPECTED: One succeeds, other gets is_duplicate=True.
         """
-        content = b"Content uploaded by two clients at once"
-        content_hash = hashlib.sha256(content).hexdigest()
-
-        # Both clients calculate the same hash
-        hash1 = content_hash
-        hash2 = hashlib.sha256(content).hexdigest()
+        # The second client's hash must match the one already stored for the first
+        content_hash = hashlib.sha256(_DEDUP_CONTENT).hexdigest()
 
-        assert hash1 == hash2, "Same content, same hash"
+        assert content_hash == _DEDUP_HASH, "Same content, same hash"
 
         # Database has unique constraint on content_hash
         # One insert succeeds, other gets IntegrityError or duplicate response
@@ -640,8 +612,6 @@ class TestEdgeCaseInputs:
 
         EXPECTED: Valid unicode preserved (within whitelist).
         """
-        from app.api.endpoints.ingestion import sanitize_filename
-
         # Current whitelist is [a-zA-Z0-9._-]
         # Unicode like 'ä' would be replaced with '_'
         unicode_filename = "Müller_Report_2024.pdf"
@@ -661,12 +631,15 @@ class TestEdgeCaseInputs:
 
         EXPECTED: Hash calculated without crash.
         """
-        # Simulate large content with smaller sample
-        # Real implementation would stream the hash calculation
-        large_content = b"x" * (10 * 1024 * 1024)  # 10MB
+        # Simulate large content with smaller sample (10MB),
+        # streamed in 64KB chunks like a real upload
+        chunk = b"x" * (64 * 1024)
+        hasher = hashlib.sha256()
+        for _ in range(10 * 1024 * 1024 // len(chunk)):
+            hasher.update(chunk)
 
         # Should not crash
-        content_hash = hashlib.sha256(large_content).hexdigest()
+        content_hash = hasher.hexdigest()
         assert len(content_hash) == 64
 
     def test_json_with_unicode_escape_sequences(self):
@@ -699,15 +672,9 @@ class TestEdgeCaseInputs:
 
         EXPECTED: Either parse correctly or reject with clear error.
         """
-        # Build deeply nested JSON
+        # Build deeply nested JSON directly as a string
         depth = 100
-        nested = {"value": "deep"}
-        for _ in range(depth):
-            nested = {"nested": nested}
-
-        # Should serialize without crash
-        json_str = json.dumps(nested)
-        assert len(json_str) > 0
+        json_str = '{"nested":' * depth + '{"value":"deep"}' + '}' * depth
 
         # Should deserialize without crash
         parsed = json.loads(json_str)
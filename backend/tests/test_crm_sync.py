@@ -16,12 +16,75 @@ from app.services.crm_sync import (
 )
 
 
+@pytest.fixture(scope="class")
+def sanitizer():
+    """Fixture: PropertySanitizer is stateless, one instance per class."""
+    return PropertySanitizer()
+
+
+@pytest.fixture(scope="class")
+def shared_tracker():
+    """Fixture: One ErrorTracker per class (see tracker)."""
+    return ErrorTracker()
+
+
+@pytest.fixture
+def tracker(shared_tracker):
+    """Fixture: Shared ErrorTracker, emptied after each test."""
+    yield shared_tracker
+    shared_tracker.clear()
+
+
+@pytest.fixture(scope="class")
+def shared_graph_store():
+    """Fixture: One graph store mock per class (see graph_store)."""
+    return AsyncMock()
+
+
+@pytest.fixture
+def graph_store(shared_graph_store):
+    """Fixture: Shared graph store mock, reset before each test."""
+    shared_graph_store.reset_mock(return_value=True, side_effect=True)
+    return shared_graph_store
+
+
+@pytest.fixture(scope="module")
+def lead_entities():
+    """Fixture: Two Lead entities (read-only input)."""
+    return {
+        "Lead": [
+            {"source_id": "lead_1", "properties": {"name": "Test"}},
+            {"source_id": "lead_2", "properties": {"name": "Test2"}}
+        ]
+    }
+
+
+@pytest.fixture(scope="module")
+def owner_relations():
+    """Fixture: Two HAS_OWNER relations to the same user (read-only input)."""
+    return [
+        {
+            "source_id": "lead_1",
+            "target_id": "user_1",
+            "edge_type": "HAS_OWNER",
+            "target_label": "User",
+            "direction": "OUTGOING"
+        },
+        {
+            "source_id": "lead_2",
+            "target_id": "user_1",
+            "edge_type": "HAS_OWNER",
+            "target_label": "User",
+            "direction": "OUTGOING"
+        }
+    ]
+
+
 class TestPropertySanitizer:
     """Tests for PropertySanitizer."""
     
-    def test_sanitize_lookup_field(self):
+    def test_sanitize_lookup_field(self, sanitizer):
         """Test sanitization of Zoho lookup fields."""
-        sanitizer = PropertySanitizer()
         props = {"Owner": {"id": "123", "name": "John Doe"}}
         
         result = sanitizer.sanitize(props)
@@ -29,9 +92,8 @@ class TestPropertySanitizer:
         assert result["owner_id"] == "123"
         assert result["owner_name"] == "John Doe"
     
-    def test_sanitize_primitive(self):
+    def test_sanitize_primitive(self, sanitizer):
         """Test that primitives pass through unchanged."""
-        sanitizer = PropertySanitizer()
         props = {"name": "Test", "amount": 1000, "active": True}
         
         result = sanitizer.sanitize(props)
@@ -40,9 +102,8 @@ class TestPropertySanitizer:
         assert result["amount"] == 1000
         assert result["active"] is True
     
-    def test_sanitize_none_values(self):
+    def test_sanitize_none_values(self, sanitizer):
         """Test that None values are skipped."""
-        sanitizer = PropertySanitizer()
         props = {"name": "Test", "email": None}
         
         result = sanitizer.sanitize(props)
@@ -50,9 +111,8 @@ class TestPropertySanitizer:
         assert "name" in result
         assert "email" not in result
     
-    def test_sanitize_list_of_dicts(self):
+    def test_sanitize_list_of_dicts(self, sanitizer):
         """Test that list of dicts is serialized to JSON."""
-        sanitizer = PropertySanitizer()
         props = {"tags": [{"name": "tag1"}, {"name": "tag2"}]}
         
         result = sanitizer.sanitize(props)
@@ -64,10 +124,8 @@ class TestPropertySanitizer:
 class TestErrorTracker:
     """Tests for ErrorTracker."""
     
-    def test_track_entity_error(self):
+    def test_track_entity_error(self, tracker):
         """Test tracking entity errors."""
-        tracker = ErrorTracker()
-        
         tracker.track_entity_error("lead_123", "Lead", Exception("Test error"))
         
         summary = tracker.get_summary()
@@ -75,10 +133,8 @@ class TestErrorTracker:
         assert summary.entity_errors[0].entity_id == "lead_123"
         assert summary.entity_errors[0].label == "Lead"
     
-    def test_track_batch_error(self):
+    def test_track_batch_error(self, tracker):
         """Test tracking batch errors."""
-        tracker = ErrorTracker()
-        
         tracker.track_batch_error("Lead nodes", 50, Exception("Batch failed"))
         
         summary = tracker.get_summary()
@@ -86,48 +142,37 @@ class TestErrorTracker:
         assert summary.batch_errors[0].batch_type == "Lead nodes"
         assert summary.batch_errors[0].batch_size == 50
     
-    def test_has_errors(self):
+    def test_has_errors(self, tracker):
         """Test error detection."""
-        tracker = ErrorTracker()
-        
         assert not tracker.has_errors()
         
         tracker.track_entity_error("lead_123", "Lead", Exception("Test"))
         
         assert tracker.has_errors()
     
-    def test_clear_errors(self):
+    def test_clear_errors(self, tracker):
         """Test clearing errors."""
-        tracker = ErrorTracker()
-        
         tracker.track_entity_error("lead_123", "Lead", Exception("Test"))
         tracker.clear()
         
         assert not tracker.has_errors()
 
 
+@pytest.mark.unit
 @pytest.mark.asyncio
 class TestNodeBatchProcessor:
     """Tests for NodeBatchProcessor."""
     
-    async def test_process_nodes_success(self):
+    async def test_process_nodes_success(self, graph_store, lead_entities):
         """Test successful node processing."""
         # Mock graph store
-        graph_store = AsyncMock()
         graph_store.query.return_value = [
             {"count": 10, "created": 5, "updated": 5}
         ]
         
         processor = NodeBatchProcessor(graph_store)
         
-        entities_by_label = {
-            "Lead": [
-                {"source_id": "lead_1", "properties": {"name": "Test"}},
-                {"source_id": "lead_2", "properties": {"name": "Test2"}}
-            ]
-        }
-        
-        result = await processor.process_nodes(entities_by_label, "zoho")
+        result = await processor.process_nodes(lead_entities, "zoho")
         
         assert result.created == 5
         assert result.updated == 5
@@ -135,70 +180,42 @@ class TestNodeBatchProcessor:
         assert graph_store.query.called
 
 
+@pytest.mark.unit
 @pytest.mark.asyncio
 class TestRelationshipProcessor:
     """Tests for RelationshipProcessor."""
     
-    async def test_process_relationships_success(self):
+    async def test_process_relationships_success(self, graph_store, owner_relations):
         """Test successful relationship processing."""
         # Mock graph store
-        graph_store = AsyncMock()
         graph_store.query.return_value = [{"count": 5}]
         
         processor = RelationshipProcessor(graph_store)
         
-        relations = [
-            {
-                "source_id": "lead_1",
-                "target_id": "user_1",
-                "edge_type": "HAS_OWNER",
-                "target_label": "User",
-                "direction": "OUTGOING"
-            }
-        ]
-        
-        result = await processor.process_relationships(relations)
+        result = await processor.process_relationships(owner_relations)
         
         assert result.created == 5
         assert graph_store.query.called
     
-    def test_group_relations(self):
+    def test_group_relations(self, graph_store, owner_relations):
         """Test relation grouping."""
-        graph_store = AsyncMock()
         processor = RelationshipProcessor(graph_store)
         
-        relations = [
-            {
-                "source_id": "lead_1",
-                "target_id": "user_1",
-                "edge_type": "HAS_OWNER",
-                "target_label": "User",
-                "direction": "OUTGOING"
-            },
-            {
-                "source_id": "lead_2",
-                "target_id": "user_1",
-                "edge_type": "HAS_OWNER",
-                "target_label": "User",
-                "direction": "OUTGOING"
-            }
-        ]
-        
-        grouped = processor._group_relations(relations)
+        grouped = processor._group_relations(owner_relations)
         
         key = ("HAS_OWNER", "User", "OUTGOING")
         assert key in grouped
         assert len(grouped[key]) == 2
 
 
+@pytest.mark.unit
 @pytest.mark.asyncio
 class TestCRMSyncOrchestrator:
     """Tests for CRMSyncOrchestrator."""
     
-    async def test_sync_success(self):
+    async def test_sync_success(self, graph_store):
         """Test successful sync workflow."""
         # Mock graph store
-        graph_store = AsyncMock()
         graph_store.get_last_sync_time.return_value = None
         graph_store.query.return_value = [
             {"count": 10, "created": 10, "updated": 0}
@@ -0,0 +1,140 @@
+"""
+Fuzzy Matching Tests - Pure-Python Fallbacks
+
+RapidFuzz is installed in production and CI, so the pure-Python distance
+implementations in app.utils.fuzzy_matching never run there. These tests
+disable RapidFuzz and compare the fallbacks against a plain DP reference.
+"""
+
+import random
+
+import pytest
+
+from app.utils import fuzzy_matching
+from app.utils.fuzzy_matching import (
+    _bit_parallel_distance,
+    bounded_levenshtein,
+    is_likely_typo,
+    levenshtein_distance,
+)
+
+
+def _reference_distance(s1: str, s2: str) -> int:
+    """Textbook O(n*m) Levenshtein DP."""
+    prev = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        cur = [i]
+        for j, c2 in enumerate(s2, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (c1 != c2)))
+        prev = cur
+    return prev[-1]
+
+
+# (s1, s2) pairs: empty, identical, non-ASCII and longer than 64 chars
+_PAIRS = [
+    ("", ""),
+    ("", "abc"),
+    ("abc", ""),
+    ("Lumix Solutions", "Lumix Solutions"),
+    ("kitten", "sitting"),
+    ("Lumix Solutions GmbH", "Lumix Solutons GmbH"),
+    ("Müller & Söhne", "Mueller & Soehne"),
+    ("Straße", "Strasse"),
+    ("北京大学", "北京大學"),
+    ("a" * 70, "a" * 69 + "b"),
+    ("x" + "abcdefghij" * 10, "abcdefghij" * 10 + "y"),
+    ("The quick brown fox jumps over the lazy dog " * 3, "The quick brown fax jumped over a lazy dog " * 3),
+]
+
+
+def _random_pairs(count: int = 300) -> list[tuple[str, str]]:
+    """Random pairs (seeded) over a small alphabet, up to 150 chars long."""
+    rng = random.Random(1234)
+    alphabet = "abcäö "
+    return [
+        (
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 150))),
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 150))),
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def without_rapidfuzz(monkeypatch):
+    """Force the pure-Python code paths."""
+    monkeypatch.setattr(fuzzy_matching, "Levenshtein", None)
+    monkeypatch.setattr(fuzzy_matching, "process", None)
+    fuzzy_matching._normalized_similarity.cache_clear()
+    yield
+    fuzzy_matching._normalized_similarity.cache_clear()
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("without_rapidfuzz")
+class TestBitParallelDistance:
+    """The Myers/Hyyrö fallback must equal the plain DP distance."""
+
+    @pytest.mark.parametrize("s1,s2", _PAIRS)
+    def test_matches_reference(self, s1, s2):
+        assert _bit_parallel_distance(s1, s2) == _reference_distance(s1, s2)
+        assert _bit_parallel_distance(s2, s1) == _reference_distance(s1, s2)
+
+    def test_matches_reference_on_random_pairs(self):
+        for s1, s2 in _random_pairs():
+            assert _bit_parallel_distance(s1, s2) == _reference_distance(s1, s2), (s1, s2)
+
+    def test_levenshtein_distance_uses_fallback(self):
+        assert levenshtein_distance("Kitten", "SITTING") == 3
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures("without_rapidfuzz")
+class TestBoundedLevenshtein:
+    """The banded fallback returns the distance, capped at max_k + 1."""
+
+    @pytest.mark.parametrize("max_k", [0, 1, 2, 3, 10])
+    @pytest.mark.parametrize("s1,s2", _PAIRS)
+    def test_matches_capped_reference(self, s1, s2, max_k):
+        expected = min(_reference_distance(s1, s2), max_k + 1)
+        assert bounded_levenshtein(s1, s2, max_k) == expected
+        assert bounded_levenshtein(s2, s1, max_k) == expected
+
+    def test_matches_capped_reference_on_random_pairs(self):
+        for s1, s2 in _random_pairs():
+            distance = _reference_distance(s1, s2)
+            for max_k in (0, 3, 20):
+                assert bounded_levenshtein(s1, s2, max_k) == min(distance, max_k + 1), (s1, s2, max_k)
+
+    def test_max_k_zero_is_equality_check(self):
+        assert bounded_levenshtein("ACME", "ACME", 0) == 0
+        assert bounded_levenshtein("ACME", "ACNE", 0) == 1
+        assert bounded_levenshtein("", "", 0) == 0
+        assert bounded_levenshtein("", "a", 0) == 1
+
+    def test_length_difference_above_bound_is_capped(self):
+        assert bounded_levenshtein("abc", "abcdefgh", 2) == 3
+
+
+@pytest.mark.unit
+class TestIsLikelyTypo:
+    """Regression guard for the bounded distance used by is_likely_typo."""
+
+    CASES = [
+        ("Lumix Solutons", "Lumix Solutions", True),
+        ("lumix", "LUMIX", True),
+        ("ACME", "ACNE C", True),
+        ("ACME", "ACNE Corp", False),
+        ("Lumix", "ACME Corp", False),
+        ("Meier", "Maier", True),
+        ("Schmidt", "Schmitt", True),
+        ("Berlin", "Bonn", False),
+    ]
+
+    @pytest.mark.parametrize("search_term,candidate,expected", CASES)
+    def test_with_rapidfuzz_if_installed(self, search_term, candidate, expected):
+        assert is_likely_typo(search_term, candidate) is expected
+
+    @pytest.mark.parametrize("search_term,candidate,expected", CASES)
+    def test_with_fallback(self, without_rapidfuzz, search_term, candidate, expected):
+        assert is_likely_typo(search_term, candidate) is expected
@@ -343,6 +343,324 @@ class TestSQLInjection:
                     f"Expected: Legitimate SELECT queries should pass validation."
                 )
 
+    def test_sql_non_select_rejected_before_parsing(self):
+        """
+        Non-SELECT statements are rejected by the leading-keyword prefilter
+        without invoking sqlparse.
+        """
+        from app.tools.sql import validate_sql_query
+
+        validate_sql_query.cache_clear()
+        with patch("app.tools.sql.sqlparse.parse") as mock_parse:
+            for query in ["DROP TABLE users", "  delete from users", "UPDATE users SET role='admin'"]:
+                is_valid, error_message = validate_sql_query(query)
+
+                assert not is_valid
+                assert "Only SELECT queries are permitted" in error_message
+
+            mock_parse.assert_not_called()
+
+    def test_sql_leading_comment_gets_comment_error(self):
+        """
+        Queries starting with a comment are rejected with the comment error,
+        not as an unknown statement type.
+        """
+        from app.tools.sql import validate_sql_query
+
+        for query in ["/* x */ SELECT 1", "-- x\nSELECT 1", "  # x\nSELECT 1"]:
+            is_valid, error_message = validate_sql_query(query)
+
+            assert not is_valid
+            assert "SQL comments" in error_message, query
+
+    def test_sql_simple_select_skips_sqlparse(self):
+        """
+        Single SELECTs without semicolons are validated without sqlparse,
+        while stacked statements still go through the parser.
+        """
+        from app.tools.sql import validate_sql_query
+        import sqlparse
+
+        validate_sql_query.cache_clear()
+        with patch("app.tools.sql.sqlparse.parse", wraps=sqlparse.parse) as mock_parse:
+            is_valid, _ = validate_sql_query("SELECT id, name FROM customers WHERE status = 'active';")
+            assert is_valid
+            mock_parse.assert_not_called()
+
+            is_valid, _ = validate_sql_query("SELECT * FROM users; DROP TABLE users")
+            assert not is_valid
+            mock_parse.assert_called_once()
+
+    def test_sql_overlong_query_rejected(self):
+        """
+        Queries above MAX_SQL_QUERY_LENGTH are rejected without parsing.
+        """
+        from app.tools.sql import MAX_SQL_QUERY_LENGTH, validate_sql_query
+
+        query = "SELECT a FROM t WHERE b IN (" + "2," * MAX_SQL_QUERY_LENGTH + "3)"
+        is_valid, error_message = validate_sql_query(query)
+
+        assert not is_valid
+        assert "too long" in error_message
+        assert "SQL_MAX_QUERY_LENGTH" in error_message
+
+    def test_sql_query_length_limit_can_be_disabled(self):
+        """
+        SQL_MAX_QUERY_LENGTH=0 disables the length limit.
+        """
+        from app.tools.sql import validate_sql_query
+
+        query = "SELECT a FROM t WHERE b IN (" + "2," * 20_000 + "3)"
+        validate_sql_query.cache_clear()
+        with patch("app.tools.sql.MAX_SQL_QUERY_LENGTH", 0):
+            is_valid, error_message = validate_sql_query(query)
+        validate_sql_query.cache_clear()
+
+        assert is_valid, error_message
+
+    def test_sql_validation_result_is_cached(self):
+        """
+        Repeated validation of the same query is served from the cache.
+        """
+        from app.tools.sql import validate_sql_query
+
+        validate_sql_query.cache_clear()
+        query = "SELECT * FROM users; DROP TABLE users;"
+
+        first = validate_sql_query(query)
+        second = validate_sql_query(query)
+
+        assert first == second
+        assert first[0] is False
+        assert validate_sql_query.cache_info().hits == 1
+
+
+@pytest.fixture
+def sqlite_source():
+    """
+    Patch the SQL connector to serve an in-memory SQLite engine with a
+    'customers' table of 150 rows.
+    """
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(
+            text("INSERT INTO customers (id, name) VALUES (:id, :name)"),
+            [{"id": i, "name": f"Customer {i}"} for i in range(1, 151)],
+        )
+
+    with patch("app.tools.sql.get_sql_connector_service") as mock_service:
+        mock_service.return_value.get_engine.return_value = engine
+        yield engine
+
+    engine.dispose()
+
+
+class TestSQLRowLimit:
+    """
+    Tests for the LIMIT clause appended to validated user queries.
+
+    The rewrite must only ever append a LIMIT to a single SELECT and leave
+    every query it can't safely extend untouched.
+    """
+
+    def test_limit_appended_after_trailing_semicolon_and_whitespace(self):
+        from app.tools.sql import _apply_row_limit
+
+        assert _apply_row_limit("SELECT * FROM users", 101, "postgresql") == "SELECT * FROM users LIMIT 101"
+        assert _apply_row_limit("SELECT * FROM users;", 101, "postgresql") == "SELECT * FROM users LIMIT 101"
+        assert _apply_row_limit("SELECT * FROM users ; \n", 101, "mysql") == "SELECT * FROM users LIMIT 101"
+
+    @pytest.mark.parametrize("query", [
+        "SELECT * FROM users LIMIT 10",
+        "SELECT * FROM users ORDER BY id FETCH FIRST 5 ROWS ONLY",
+        "SELECT * FROM users ORDER BY id OFFSET 20",
+        "SELECT * FROM users FOR UPDATE",
+        "select * from users limit 10;",
+    ])
+    def test_existing_row_clause_left_untouched(self, query):
+        from app.tools.sql import _apply_row_limit
+
+        assert _apply_row_limit(query, 101, "postgresql") == query
+
+    @pytest.mark.parametrize("dialect_name", ["mssql", "oracle", "unknown"])
+    def test_unsupported_dialect_left_untouched(self, dialect_name):
+        from app.tools.sql import _apply_row_limit
+
+        query = "SELECT * FROM users"
+        assert _apply_row_limit(query, 101, dialect_name) == query
+
+    def test_truncation_notice_shown_when_limit_cuts_rows(self, sqlite_source):
+        """101 rows are fetched for a 100 row budget, the extra one triggers the notice."""
+        from app.tools.sql import execute_sql_query
+
+        result = execute_sql_query.invoke({"query": "SELECT id, name FROM customers ORDER BY id;"})
+
+        lines = result.split("\n\n(Hinweis")[0].splitlines()
+        assert "(Hinweis: Ergebnisse auf 100 Zeilen begrenzt)" in result
+        # Format note + header + 100 data rows
+        assert len(lines) == 102
+        assert lines[-1] == "100,Customer 100"
+
+    def test_no_truncation_notice_at_exactly_100_rows(self, sqlite_source):
+        from app.tools.sql import execute_sql_query
+
+        result = execute_sql_query.invoke({"query": "SELECT id FROM customers WHERE id <= 100"})
+
+        assert "Hinweis" not in result
+        assert result.splitlines()[-1] == "100"
+
+
+class TestSQLResultFormat:
+    """
+    Tests for the result format the LLM sees (CSV by default, JSON on request).
+    """
+
+    def test_csv_has_format_note_and_header_row(self, sqlite_source):
+        from app.tools.sql import execute_sql_query
+
+        result = execute_sql_query.invoke({"query": "SELECT id, name FROM customers WHERE id <= 2"})
+
+        assert result.splitlines() == [
+            "Format: CSV (erste Zeile = Spaltennamen)",
+            "id,name",
+            "1,Customer 1",
+            "2,Customer 2",
+        ]
+
+    def test_csv_quotes_commas_and_quotes(self, sqlite_source):
+        import csv
+
+        from app.tools.sql import execute_sql_query
+
+        result = execute_sql_query.invoke({
+            "query": "SELECT 'Müller, Hans' AS name, 'sagt \"Hallo\"' AS note FROM customers WHERE id = 1"
+        })
+
+        lines = result.splitlines()
+        assert lines[2] == '"Müller, Hans","sagt ""Hallo"""'
+        assert list(csv.reader(lines[1:])) == [["name", "note"], ["Müller, Hans", 'sagt "Hallo"']]
+
+    def test_json_format_returns_list_of_objects(self, sqlite_source):
+        import json
+
+        from app.tools.sql import execute_sql_query
+
+        result = execute_sql_query.invoke({
+            "query": "SELECT id, name FROM customers WHERE id <= 2",
+            "result_format": "json",
+        })
+
+        assert json.loads(result) == [
+            {"id": 1, "name": "Customer 1"},
+            {"id": 2, "name": "Customer 2"},
+        ]
+
+
+@pytest.fixture
+def schema_cache(sqlite_source):
+    """Empty get_sql_schema cache; counts schema reflections via inspect()."""
+    from app.tools import sql
+
+    sql.clear_sql_schema_cache()
+    with patch("app.tools.sql.inspect", wraps=sql.inspect) as mock_inspect:
+        yield mock_inspect
+    sql.clear_sql_schema_cache()
+
+
+class TestSQLSchemaCache:
+    """
+    Tests for the get_sql_schema cache.
+
+    Cached schemas must never outlive their engine, their TTL or an explicit clear,
+    otherwise the LLM writes queries against a stale schema.
+    """
+
+    def test_repeated_call_served_from_cache(self, schema_cache):
+        from app.tools.sql import get_sql_schema
+
+        first = get_sql_schema.invoke({"source_id": "erp"})
+        second = get_sql_schema.invoke({"source_id": "erp"})
+
+        assert "customers" in first
+        assert second == first
+        assert schema_cache.call_count == 1
+
+    def test_expired_entry_is_rebuilt(self, schema_cache):
+        from app.tools.sql import SCHEMA_CACHE_TTL_SECONDS, get_sql_schema
+
+        with patch("app.tools.sql.time.monotonic", return_value=1000.0):
+            get_sql_schema.invoke({"source_id": "erp"})
+        with patch("app.tools.sql.time.monotonic", return_value=1000.0 + SCHEMA_CACHE_TTL_SECONDS - 1):
+            get_sql_schema.invoke({"source_id": "erp"})
+        assert schema_cache.call_count == 1
+
+        with patch("app.tools.sql.time.monotonic", return_value=1000.0 + SCHEMA_CACHE_TTL_SECONDS + 1):
+            get_sql_schema.invoke({"source_id": "erp"})
+        assert schema_cache.call_count == 2
+
+    def test_new_engine_invalidates_entry(self, schema_cache):
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.pool import StaticPool
+
+        from app.tools.sql import get_sql_schema
+
+        assert "customers" in get_sql_schema.invoke({"source_id": "erp"})
+
+        # Same source, replaced engine (e.g. after reload_sources()) with another schema
+        new_engine = create_engine("sqlite://", poolclass=StaticPool)
+        with new_engine.begin() as connection:
+            connection.execute(text("CREATE TABLE invoices (id INTEGER PRIMARY KEY)"))
+        with patch("app.tools.sql.get_sql_connector_service") as mock_service:
+            mock_service.return_value.get_engine.return_value = new_engine
+            result = get_sql_schema.invoke({"source_id": "erp"})
+        new_engine.dispose()
+
+        assert "invoices" in result
+        assert "customers" not in result
+        assert schema_cache.call_count == 2
+
+    def test_clear_single_source(self, schema_cache):
+        from app.tools.sql import clear_sql_schema_cache, get_sql_schema
+
+        get_sql_schema.invoke({"source_id": "erp"})
+        get_sql_schema.invoke({"source_id": "iot"})
+        clear_sql_schema_cache("erp")
+        get_sql_schema.invoke({"source_id": "erp"})
+        get_sql_schema.invoke({"source_id": "iot"})
+
+        # erp rebuilt once, iot still cached
+        assert schema_cache.call_count == 3
+
+    def test_oldest_entry_evicted_at_capacity(self, schema_cache):
+        from app.tools import sql
+
+        for i in range(sql.SCHEMA_CACHE_MAX_ENTRIES + 1):
+            sql.get_sql_schema.invoke({"source_id": f"source_{i}"})
+
+        cached_sources = [key[0] for key in sql._schema_cache]
+        assert len(cached_sources) == sql.SCHEMA_CACHE_MAX_ENTRIES
+        assert "source_0" not in cached_sources
+        assert cached_sources[-1] == f"source_{sql.SCHEMA_CACHE_MAX_ENTRIES}"
+
+    def test_reload_sources_closes_engines(self):
+        """A reload must replace the engines, which also invalidates cached schemas."""
+        from app.services import sql_connector
+
+        with patch.object(sql_connector, "metadata_service"), \
+                patch.object(sql_connector, "reset_metadata_service"):
+            connector = sql_connector.SQLConnectorService()
+            engine = MagicMock()
+            connector._engines["erp"] = engine
+
+            connector.reload_sources()
+
+        engine.dispose.assert_called_once()
+        assert connector._engines == {}
+
 
 # =============================================================================
 # TEST CATEGORY 3: PATH TRAVERSAL (2.5)
@@ -213,7 +213,7 @@ class TestEmptyStates:
         mock_engine = MagicMock()
         mock_connection = MagicMock()
         mock_result = MagicMock()
-        mock_result.__iter__ = lambda self: iter([])  # Empty result set
+        mock_result.mappings.return_value.fetchmany.return_value = []  # Empty result set
 
         mock_connection.execute.return_value = mock_result
         mock_engine.connect.return_value.__enter__ = lambda self: mock_connection